@@ -1,31 +1,72 @@
-"""
-Godot Auto Dumper
-=================
-Automatically dump ClassDB from running Godot 4.x games.
-
-Usage:
-    from godot_dumper import GodotDumper
-    
-    dumper = GodotDumper()
-    dumper.auto_init()
-    classes = dumper.dump_classes()
-    dumper.save_hpp("GodotSDK.hpp")
-"""
-
-from .dumper import GodotDumper
-from .memory import MemoryReader
-from .process import find_godot_process, get_module_info
-from .scanner import scan_for_classdb
-from .parser import dump_all_classes
-from .generator import generate_hpp
-
-__version__ = "1.0.0"
-__all__ = [
-    "GodotDumper",
-    "MemoryReader", 
-    "find_godot_process",
-    "get_module_info",
-    "scan_for_classdb",
-    "dump_all_classes",
-    "generate_hpp",
-]
+"""
+Godot Auto Dumper
+=================
+Automatically dump ClassDB from running Godot 4.x games.
+
+Usage:
+    from godot_dumper import GodotDumper
+    
+    dumper = GodotDumper()
+    dumper.auto_init()
+    classes = dumper.dump_classes()
+    dumper.save_hpp("GodotSDK.hpp")
+"""
+
+from .dumper import GodotDumper
+from .aio import AsyncGodotDumper
+from .multi import dump_processes
+from .watch import ClassDBWatcher
+from .memory import MemoryReader
+from .regions import RegionMap
+from .backends import (
+    MemoryBackend,
+    WindowsProcessBackend,
+    ProcMemBackend,
+    MemoryImageBackend,
+    write_memory_image,
+)
+from .snapshot import RecordingBackend, SnapshotBackend
+from .offsets import ClassDBOffsetCache
+from .process import find_godot_process, get_module_info, get_module_fingerprint
+from .scanner import scan_for_classdb
+from .parser import dump_all_classes
+from .generator import generate_hpp, write_hpp, write_split_hpp
+from .database import ClassDatabase, save_db, load_db
+from .index import ClassIndex
+from .layout import LayoutEngine
+from .profiler import Profiler, ProfilingBackend
+from .synthetic import build_synthetic_image
+
+__version__ = "1.0.0"
+__all__ = [
+    "GodotDumper",
+    "AsyncGodotDumper",
+    "dump_processes",
+    "ClassDBWatcher",
+    "MemoryReader", 
+    "RegionMap",
+    "MemoryBackend",
+    "WindowsProcessBackend",
+    "ProcMemBackend",
+    "MemoryImageBackend",
+    "write_memory_image",
+    "RecordingBackend",
+    "SnapshotBackend",
+    "find_godot_process",
+    "get_module_info",
+    "get_module_fingerprint",
+    "ClassDBOffsetCache",
+    "scan_for_classdb",
+    "dump_all_classes",
+    "generate_hpp",
+    "write_hpp",
+    "write_split_hpp",
+    "ClassDatabase",
+    "save_db",
+    "load_db",
+    "ClassIndex",
+    "LayoutEngine",
+    "Profiler",
+    "ProfilingBackend",
+    "build_synthetic_image",
+]
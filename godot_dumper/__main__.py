@@ -1,75 +1,160 @@
-"""
-命令行入口
-python -m godot_dumper
-"""
-
-from .dumper import GodotDumper
-from .process import find_godot_process
-
-
-def main():
-    print("=" * 60)
-    print("Godot Auto Dumper v1.0")
-    print("=" * 60)
-    
-    # 1. 查找进程
-    print("\n[*] 搜索 Godot 进程 (窗口类名: Engine)...")
-    processes = find_godot_process()
-    
-    if not processes:
-        print("[-] 未找到 Godot 进程")
-        print("    请确保游戏正在运行")
-        return
-    
-    # 多进程选择
-    process_index = 0
-    if len(processes) > 1:
-        print(f"[!] 找到 {len(processes)} 个 Godot 进程:")
-        for i, p in enumerate(processes):
-            print(f"    [{i}] PID={p['pid']} Title=\"{p['title']}\"")
-        process_index = int(input("选择进程 [0]: ") or "0")
-    
-    # 2. 初始化
-    dumper = GodotDumper()
-    if not dumper.auto_init(process_index):
-        return
-    
-    print(f"[+] 目标进程: PID={dumper.pid} Title=\"{dumper.title}\"")
-    print(f"[+] 模块: {dumper.module_name}")
-    print(f"[+] 基址: {hex(dumper.base)}")
-    print(f"[+] 大小: {hex(dumper.module_size)}")
-    
-    print(f"\n[+] PE 段:")
-    for sec in dumper.sections:
-        print(f"    {sec['name']}: {hex(sec['va'])} size={hex(sec['size'])}")
-    
-    print(f"\n[+] ClassDB: base + {hex(dumper.classdb_offset)}")
-    
-    # 3. 提取类
-    print(f"\n[*] 提取类信息...")
-    classes = dumper.dump_classes()
-    
-    stats = dumper.get_stats()
-    print(f"[+] 共提取 {stats['class_count']} 个类")
-    print(f"[+] 共提取 {stats['method_count']} 个方法")
-    print(f"[+] 共提取 {stats['property_count']} 个属性")
-    
-    # 4. 保存
-    print(f"\n[*] 保存文件...")
-    dumper.save_json('godot_classes.json')
-    print(f"[+] godot_classes.json")
-    
-    dumper.save_hpp('GodotSDK.hpp')
-    print(f"[+] GodotSDK.hpp")
-    
-    # 5. 统计
-    print(f"\n[*] Top 10 类 (按方法数):")
-    top_classes = sorted(classes.items(), key=lambda x: len(x[1]['methods']), reverse=True)[:10]
-    for name, cls in top_classes:
-        print(f"    {name}: {len(cls['methods'])} methods, {len(cls['properties'])} properties")
-    
-    print(f"\n[+] 完成!")
-
-
-if __name__ == "__main__":
-    main()
+"""
+命令行入口
+python -m godot_dumper [--all] [--watch SECONDS] [--profile [report.json]]
+"""
+
+import argparse
+import os
+import time
+from .dumper import GodotDumper
+from .multi import dump_processes
+from .process import find_godot_process
+from .watch import ClassDBWatcher
+
+
+def dump_all(processes: list[dict], profile: str | None) -> None:
+    """
+    --all: 并发 dump 所有进程，每个不同的构建保存一份文件
+    
+    profile 为 JSON 路径时每个进程写入 <名称>_<pid>.json
+    """
+    print(f"[*] 并发 dump {len(processes)} 个进程...")
+    results = dump_processes(processes, profile=profile is not None)
+    
+    # 同一进程的多个窗口共享同一结果
+    for r in {id(r): r for r in results}.values():
+        if r['error']:
+            print(f"[-] PID={r['pid']} \"{r['title']}\": {r['error']}")
+        elif r['reused_from'] is not None:
+            print(f"[+] PID={r['pid']} \"{r['title']}\": 与 PID={r['reused_from']} 为同一构建，复用结果")
+        else:
+            dumper = r['dumper']
+            stats = dumper.get_stats()
+            json_path = f"godot_classes_{r['pid']}.json"
+            hpp_path = f"GodotSDK_{r['pid']}.hpp"
+            dumper.save_json(json_path)
+            dumper.save_hpp(hpp_path)
+            print(f"[+] PID={r['pid']} \"{r['title']}\": {stats['class_count']} 个类 -> {json_path}, {hpp_path}")
+            if dumper.profiler:
+                print(dumper.profiler.format_report())
+                if profile != '-':
+                    root, ext = os.path.splitext(profile)
+                    profile_path = f"{root}_{r['pid']}{ext}"
+                    dumper.profiler.save_json(profile_path)
+                    print(f"[+] {profile_path}")
+    
+    print(f"\n[+] 完成!")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog='python -m godot_dumper')
+    parser.add_argument('--all', action='store_true',
+                        help='并发 dump 所有 Godot 进程 (同一构建只 dump 一次)')
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help='dump 后保持附加，按间隔监视新注册/移除/变化的类并更新输出文件')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='JSON',
+                        help='输出各阶段耗时与读取统计 (指定文件时写入 JSON)')
+    args = parser.parse_args(argv)
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch 的间隔必须大于 0")
+    if args.all and args.watch is not None:
+        parser.error("--watch 不能与 --all 同时使用")
+    
+    print("=" * 60)
+    print("Godot Auto Dumper v1.0")
+    print("=" * 60)
+    
+    # 1. 查找进程
+    print("\n[*] 搜索 Godot 进程 (窗口类名: Engine)...")
+    processes = find_godot_process()
+    
+    if not processes:
+        print("[-] 未找到 Godot 进程")
+        print("    请确保游戏正在运行")
+        return
+    
+    if args.all:
+        dump_all(processes, args.profile)
+        return
+    
+    # 多进程选择
+    process_index = 0
+    if len(processes) > 1:
+        print(f"[!] 找到 {len(processes)} 个 Godot 进程:")
+        for i, p in enumerate(processes):
+            print(f"    [{i}] PID={p['pid']} Title=\"{p['title']}\"")
+        process_index = int(input("选择进程 [0]: ") or "0")
+    
+    # 2. 初始化
+    dumper = GodotDumper(profile=args.profile is not None)
+    if not dumper.auto_init(process_index):
+        return
+    
+    print(f"[+] 目标进程: PID={dumper.pid} Title=\"{dumper.title}\"")
+    print(f"[+] 模块: {dumper.module_name}")
+    print(f"[+] 基址: {hex(dumper.base)}")
+    print(f"[+] 大小: {hex(dumper.module_size)}")
+    
+    print(f"\n[+] PE 段:")
+    for sec in dumper.sections:
+        print(f"    {sec['name']}: {hex(sec['va'])} size={hex(sec['size'])}")
+    
+    print(f"\n[+] ClassDB: base + {hex(dumper.classdb_offset)}")
+    
+    # 3. 提取类
+    print(f"\n[*] 提取类信息...")
+    classes = dumper.dump_classes()
+    
+    stats = dumper.get_stats()
+    print(f"[+] 共提取 {stats['class_count']} 个类")
+    print(f"[+] 共提取 {stats['method_count']} 个方法")
+    print(f"[+] 共提取 {stats['property_count']} 个属性")
+    
+    # 4. 保存
+    print(f"\n[*] 保存文件...")
+    dumper.save_json('godot_classes.json')
+    print(f"[+] godot_classes.json")
+    
+    dumper.save_hpp('GodotSDK.hpp')
+    print(f"[+] GodotSDK.hpp")
+    
+    # 5. 统计
+    print(f"\n[*] Top 10 类 (按方法数):")
+    top_classes = sorted(classes.items(), key=lambda x: len(x[1]['methods']), reverse=True)[:10]
+    for name, cls in top_classes:
+        print(f"    {name}: {len(cls['methods'])} methods, {len(cls['properties'])} properties")
+    
+    if dumper.profiler:
+        print(f"\n[*] Profile:")
+        print(dumper.profiler.format_report())
+        if args.profile != '-':
+            dumper.profiler.save_json(args.profile)
+            print(f"[+] {args.profile}")
+    
+    print(f"\n[+] 完成!")
+    
+    if args.watch is not None:
+        watch(dumper, args.watch)
+
+
+def watch(dumper: GodotDumper, interval: float) -> None:
+    """--watch: 输出类变化事件，有变化时重新保存文件 (Ctrl+C 结束)"""
+    print(f"\n[*] 监视 ClassDB 变化 (间隔 {interval}s, Ctrl+C 结束)...")
+    watcher = ClassDBWatcher(dumper)
+    marks = {'added': '+', 'removed': '-', 'changed': '~'}
+    try:
+        while True:
+            events = watcher.poll()
+            for event in events:
+                print(f"[{marks[event['event']]}] {event['class']}")
+            if events:
+                dumper.save_json('godot_classes.json')
+                dumper.save_hpp('GodotSDK.hpp')
+                print(f"[+] 已更新 godot_classes.json / GodotSDK.hpp ({len(dumper.classes)} 个类)")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n[+] 结束监视")
+
+
+if __name__ == "__main__":
+    main()
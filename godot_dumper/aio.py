@@ -0,0 +1,230 @@
+"""
+asyncio 接口
+
+AsyncGodotDumper 把 GodotDumper 的阻塞操作放到线程池中执行，事件循环在扫描、
+解析期间保持响应。进度以事件 dict 回调或 async for 产出，任务取消后后台操作
+在下一个检查点 (扫描块、解析完一个类) 停止
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from .dumper import GodotDumper
+from .parser import iter_all_classes
+
+# 解析进度事件的最小间隔 (秒)
+PROGRESS_INTERVAL = 0.1
+
+
+class _Cancelled(Exception):
+    """后台操作被取消"""
+
+
+class _ProgressChannel:
+    """后台线程 -> 事件循环的进度通道，同时作为取消检查点"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: Callable[[dict], None] | None):
+        self.loop = loop
+        self.callback = callback
+        self.cancelled = threading.Event()
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise _Cancelled()
+
+    def __call__(self, event: dict) -> None:
+        self.check()
+        if self.callback:
+            self.loop.call_soon_threadsafe(self.callback, event)
+
+
+class AsyncGodotDumper:
+    """
+    asyncio 版 Dumper
+
+    同一个实例上的初始化与 dump 依次执行；保存等操作与之共享并发上限
+
+    Args:
+        dumper: 包装的 GodotDumper，None 时用 kwargs 新建
+        max_concurrency: 同时在线程池中执行的操作数，也是解析类成员的线程数
+        executor: 线程池，None 时新建 (close() 时关闭)
+
+    进度事件:
+        {'phase': 'sections', 'sections': [...]}
+        {'phase': 'scan', 'section', 'scanned', 'total'}
+        {'phase': 'parse', 'class', 'parsed', 'total', 'elapsed', 'eta'}
+    """
+
+    def __init__(self, dumper: GodotDumper | None = None, max_concurrency: int = 4,
+                 executor: ThreadPoolExecutor | None = None, **kwargs):
+        self.dumper = dumper or GodotDumper(**kwargs)
+        self.max_concurrency = max_concurrency
+        self._executor = executor
+        self._own_executor = executor is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._state_lock = asyncio.Lock()
+
+    def __getattr__(self, name):
+        # classes / get_stats / index 等同步属性直接取自 GodotDumper
+        if name == 'dumper':
+            raise AttributeError(name)
+        return getattr(self.dumper, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='godot_dumper')
+        return self._executor
+
+    async def _run(self, func, *args, progress: Callable[[dict], None] | None = None):
+        """
+        在线程池中执行 func(channel, *args)
+
+        任务被取消时通知后台操作停止，并等待其退出后再传播 CancelledError
+        """
+        channel = _ProgressChannel(asyncio.get_running_loop(), progress)
+        async with self._semaphore:
+            future = self._get_executor().submit(func, channel, *args)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                channel.cancelled.set()
+                try:
+                    await asyncio.wrap_future(future)
+                except BaseException:
+                    pass
+                raise
+
+    async def _run_stateful(self, func, *args, progress=None):
+        def call(channel, *call_args):
+            self.dumper.progress = channel
+            try:
+                return func(*call_args)
+            finally:
+                self.dumper.progress = None
+
+        async with self._state_lock:
+            return await self._run(call, *args, progress=progress)
+
+    async def auto_init(self, process_index: int = 0, progress=None) -> bool:
+        """见 GodotDumper.auto_init"""
+        return await self._run_stateful(self.dumper.auto_init, process_index, progress=progress)
+
+    async def attach(self, pid: int, title: str | None = None, progress=None) -> bool:
+        """见 GodotDumper.attach"""
+        return await self._run_stateful(self.dumper.attach, pid, title, progress=progress)
+
+    async def open_image(self, path: str, progress=None) -> bool:
+        """见 GodotDumper.open_image"""
+        return await self._run_stateful(self.dumper.open_image, path, progress=progress)
+
+    async def load_snapshot(self, path: str, progress=None) -> bool:
+        """见 GodotDumper.load_snapshot"""
+        return await self._run_stateful(self.dumper.load_snapshot, path, progress=progress)
+
+    async def dump_classes(self, previous: dict | str | None = None, progress=None) -> dict:
+        """
+        提取所有类信息，解析期间按 PROGRESS_INTERVAL 报告进度与预计剩余时间
+
+        成员解析使用 max_concurrency 个线程；取消时已解析的类被丢弃
+        """
+        async with self._state_lock:
+            return await self._run(self._dump, previous, progress=progress)
+
+    def _dump(self, channel: _ProgressChannel, previous) -> dict:
+        d = self.dumper
+        if not d.reader or not d.classdb_addr:
+            raise RuntimeError("请先调用 auto_init()")
+
+        if isinstance(previous, str):
+            with open(previous, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+
+        total = d.reader.read_dword(d.classdb_addr + 36) or 0
+        classes = {}
+        start = last = time.perf_counter()
+        with d._phase('parse'):
+            classes_iter = iter_all_classes(
+                d.reader, d.classdb_addr, d.base, d.module_size,
+                workers=self.max_concurrency, previous=previous
+            )
+            try:
+                for cls in classes_iter:
+                    channel.check()
+                    classes[cls['name']] = cls
+                    now = time.perf_counter()
+                    parsed = len(classes)
+                    if now - last >= PROGRESS_INTERVAL or parsed == total:
+                        last = now
+                        elapsed = now - start
+                        channel({
+                            'phase': 'parse',
+                            'class': cls['name'],
+                            'parsed': parsed,
+                            'total': total,
+                            'elapsed': elapsed,
+                            'eta': elapsed / parsed * max(total - parsed, 0),
+                        })
+            finally:
+                classes_iter.close()
+        return d._finish_dump(classes, previous)
+
+    async def events(self, method, *args, **kwargs):
+        """
+        以 async for 的形式运行一个带 progress 的方法并产出进度事件
+
+        最后产出 {'phase': 'done', 'result': 返回值}。提前退出循环时取消该操作
+
+            async for event in adumper.events(adumper.dump_classes):
+                ...
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(method(*args, progress=queue.put_nowait, **kwargs))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            yield {'phase': 'done', 'result': task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _save(self, func, *args):
+        return await self._run(lambda channel, *a: func(*a), *args)
+
+    async def save_json(self, path: str) -> None:
+        await self._save(self.dumper.save_json, path)
+
+    async def save_db(self, path: str) -> None:
+        await self._save(self.dumper.save_db, path)
+
+    async def save_hpp(self, path: str) -> None:
+        await self._save(self.dumper.save_hpp, path)
+
+    async def save_split_hpp(self, out_dir: str, umbrella: str = "GodotSDK.hpp",
+                             workers: int = 1) -> list[str]:
+        return await self._save(self.dumper.save_split_hpp, out_dir, umbrella, workers)
+
+    async def save_snapshot(self, path: str) -> None:
+        await self._save(self.dumper.save_snapshot, path)
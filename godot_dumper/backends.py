@@ -0,0 +1,277 @@
+"""
+内存读取后端
+"""
+
+import bisect
+import ctypes
+import mmap
+import os
+import struct
+import sys
+
+PROCESS_VM_READ = 0x0010
+PROCESS_QUERY_INFORMATION = 0x0400
+
+# VirtualQueryEx
+MEM_COMMIT = 0x1000
+PAGE_GUARD = 0x100
+# PAGE_READONLY | PAGE_READWRITE | PAGE_WRITECOPY | PAGE_EXECUTE_READ |
+# PAGE_EXECUTE_READWRITE | PAGE_EXECUTE_WRITECOPY
+PAGE_READABLE = 0x02 | 0x04 | 0x08 | 0x20 | 0x40 | 0x80
+USER_SPACE_END = 0x7FFFFFFFFFFF
+
+# 内存镜像文件格式
+# Header: magic(8) version(u32) region_count(u32) base(u64) module_size(u64)
+# Region: va(u64) size(u64) file_offset(u64)
+IMAGE_MAGIC = b'GDMEMIMG'
+IMAGE_VERSION = 1
+IMAGE_HEADER = struct.Struct('<8sIIQQ')
+IMAGE_REGION = struct.Struct('<QQQ')
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+    OpenProcess = kernel32.OpenProcess
+    OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    OpenProcess.restype = wintypes.HANDLE
+
+    ReadProcessMemory = kernel32.ReadProcessMemory
+    ReadProcessMemory.argtypes = [
+        wintypes.HANDLE, ctypes.c_uint64, wintypes.LPVOID,
+        ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)
+    ]
+    ReadProcessMemory.restype = wintypes.BOOL
+
+    class MEMORY_BASIC_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ('BaseAddress', ctypes.c_void_p),
+            ('AllocationBase', ctypes.c_void_p),
+            ('AllocationProtect', wintypes.DWORD),
+            ('PartitionId', wintypes.WORD),
+            ('RegionSize', ctypes.c_size_t),
+            ('State', wintypes.DWORD),
+            ('Protect', wintypes.DWORD),
+            ('Type', wintypes.DWORD),
+        ]
+
+    VirtualQueryEx = kernel32.VirtualQueryEx
+    VirtualQueryEx.argtypes = [
+        wintypes.HANDLE, ctypes.c_uint64,
+        ctypes.POINTER(MEMORY_BASIC_INFORMATION), ctypes.c_size_t
+    ]
+    VirtualQueryEx.restype = ctypes.c_size_t
+
+    CloseHandle = kernel32.CloseHandle
+
+
+class MemoryBackend:
+    """内存后端接口"""
+
+    def read(self, address: int, size: int) -> bytes | None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def spec(self) -> tuple | None:
+        """
+        可序列化的打开方式 (cls, args)，供子进程重新打开同一目标
+
+        无法在其他进程重新打开时返回 None
+        """
+        return None
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        """
+        已提交且可读的内存区域 [(起始地址, 大小), ...]
+
+        无法获取时返回 None
+        """
+        return None
+
+
+class WindowsProcessBackend(MemoryBackend):
+    """ReadProcessMemory 后端 (Windows)"""
+
+    def __init__(self, pid: int):
+        if sys.platform != 'win32':
+            raise OSError("WindowsProcessBackend 仅支持 Windows")
+        self.pid = pid
+        self.handle = OpenProcess(PROCESS_VM_READ | PROCESS_QUERY_INFORMATION, False, pid)
+        if not self.handle:
+            raise Exception(f"无法打开进程 {pid}")
+
+    def spec(self) -> tuple | None:
+        return (WindowsProcessBackend, (self.pid,))
+
+    def read(self, address: int, size: int) -> bytes | None:
+        buffer = ctypes.create_string_buffer(size)
+        bytes_read = ctypes.c_size_t()
+        if not ReadProcessMemory(self.handle, address, buffer, size, ctypes.byref(bytes_read)):
+            return None
+        return buffer.raw[:bytes_read.value]
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        mbi = MEMORY_BASIC_INFORMATION()
+        regions = []
+        address = 0
+        while address < USER_SPACE_END:
+            if not VirtualQueryEx(self.handle, address, ctypes.byref(mbi), ctypes.sizeof(mbi)):
+                break
+            region_base = mbi.BaseAddress or 0
+            if not mbi.RegionSize:
+                break
+            if (mbi.State == MEM_COMMIT and mbi.Protect & PAGE_READABLE
+                    and not mbi.Protect & PAGE_GUARD):
+                regions.append((region_base, mbi.RegionSize))
+            address = region_base + mbi.RegionSize
+        return regions or None
+
+    def close(self) -> None:
+        if self.handle:
+            CloseHandle(self.handle)
+            self.handle = None
+
+
+class ProcMemBackend(MemoryBackend):
+    """/proc/<pid>/mem 后端 (Linux 导出、Wine/Proton 目标)"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        try:
+            self.fd = os.open(f'/proc/{pid}/mem', os.O_RDONLY)
+        except OSError as e:
+            raise Exception(f"无法打开进程 {pid}: {e}")
+
+    def spec(self) -> tuple | None:
+        return (ProcMemBackend, (self.pid,))
+
+    def read(self, address: int, size: int) -> bytes | None:
+        try:
+            data = os.pread(self.fd, size, address)
+        except (OSError, OverflowError):
+            return None
+        return data or None
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        try:
+            with open(f'/proc/{self.pid}/maps', 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        regions = []
+        for line in lines:
+            parts = line.split(None, 5)
+            if len(parts) < 5 or not parts[1].startswith('r'):
+                continue
+            # [vvar] 等内核映射不能通过 /proc/<pid>/mem 读取
+            if len(parts) == 6 and parts[5].strip() in ('[vvar]', '[vvar_vclock]', '[vsyscall]'):
+                continue
+            start, end = (int(x, 16) for x in parts[0].split('-'))
+            regions.append((start, end - start))
+        return regions or None
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class MemoryImageBackend(MemoryBackend):
+    """
+    内存镜像后端
+
+    通过 mmap 映射镜像文件，按区域表提供读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, self.base, self.module_size = IMAGE_HEADER.unpack_from(self._mm, 0)
+        if magic != IMAGE_MAGIC or version != IMAGE_VERSION:
+            self.close()
+            raise Exception(f"无效的内存镜像: {path}")
+
+        regions = []
+        for i in range(count):
+            va, size, file_offset = IMAGE_REGION.unpack_from(
+                self._mm, IMAGE_HEADER.size + i * IMAGE_REGION.size
+            )
+            regions.append((va, size, file_offset))
+        regions.sort()
+        self.region_table = regions
+        self._starts = [r[0] for r in regions]
+
+    def spec(self) -> tuple | None:
+        return (MemoryImageBackend, (self.path,))
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        return [(va, size) for va, size, _ in self.region_table] or None
+
+    def _locate(self, address: int, size: int) -> int | None:
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i < 0:
+            return None
+        va, region_size, file_offset = self.region_table[i]
+        if address + size > va + region_size:
+            return None
+        return file_offset + (address - va)
+
+    def view(self, address: int, size: int) -> memoryview | None:
+        """零拷贝读取"""
+        offset = self._locate(address, size)
+        if offset is None:
+            return None
+        return memoryview(self._mm)[offset:offset + size]
+
+    def read(self, address: int, size: int) -> bytes | None:
+        offset = self._locate(address, size)
+        if offset is None:
+            return None
+        return self._mm[offset:offset + size]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_process_backend(pid: int) -> MemoryBackend:
+    """按平台选择进程后端"""
+    if sys.platform == 'win32':
+        return WindowsProcessBackend(pid)
+    return ProcMemBackend(pid)
+
+
+def open_backend(spec: tuple) -> MemoryBackend:
+    """按 spec() 返回的 (cls, args) 打开后端"""
+    cls, args = spec
+    return cls(*args)
+
+
+def write_memory_image(path: str, regions: list[tuple[int, bytes]], base: int, module_size: int) -> None:
+    """
+    写入内存镜像文件
+
+    Args:
+        regions: [(虚拟地址, 数据), ...]
+    """
+    regions = sorted(regions, key=lambda r: r[0])
+    file_offset = IMAGE_HEADER.size + len(regions) * IMAGE_REGION.size
+    with open(path, 'wb') as f:
+        f.write(IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, len(regions), base, module_size))
+        for va, data in regions:
+            f.write(IMAGE_REGION.pack(va, len(data), file_offset))
+            file_offset += len(data)
+        for _, data in regions:
+            f.write(data)
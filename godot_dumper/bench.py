@@ -0,0 +1,83 @@
+"""
+性能基准
+python -m godot_dumper.bench [--scales 100 1000 10000] [--xrefs 16] [--json bench.json]
+
+对合成内存镜像依次运行 scan / dump / generate 三个阶段，
+报告每个阶段的耗时、读取调用次数与读取字节数 (由 Profiler 统计)。
+scan 阶段在镜像含有 ClassDB 引用时只走引用定位，scan_full 阶段另外计时
+不使用引用定位的段扫描 (整段读取、预筛选与候选打分)
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from .dumper import GodotDumper
+from .generator import generate_hpp
+from .scanner import scan_for_classdb
+from .synthetic import build_synthetic_image
+
+DEFAULT_SCALES = (100, 1000, 10000)
+
+
+def run_benchmark(image_path: str, workers: int = 1) -> dict:
+    """
+    对单个镜像运行所有阶段
+
+    Returns:
+        dict: Profiler.report() 的结果，另含 'classes': 类数量
+    """
+    dumper = GodotDumper(offset_cache=False, profile=True)
+    if not dumper.open_image(image_path):
+        raise Exception(f"未找到 ClassDB: {image_path}")
+    classes = dumper.dump_classes(workers=workers)
+    with dumper.profiler.phase('generate'):
+        generate_hpp(classes)
+    with dumper.profiler.phase('scan_full'):
+        scan_for_classdb(dumper.reader, dumper.base, dumper.module_size, dumper.sections,
+                         use_xrefs=False, stop_when_confident=True)
+    dumper.reader.backend.close()
+    results = dumper.profiler.report()
+    results['classes'] = len(classes)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m godot_dumper.bench')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help='类数量')
+    parser.add_argument('--methods', type=int, default=10, help='每个类的方法数')
+    parser.add_argument('--properties', type=int, default=4, help='每个类的属性数')
+    parser.add_argument('--xrefs', type=int, default=16,
+                        help='.text 中引用 ClassDB 的指令数，0 时 scan 阶段也走段扫描')
+    parser.add_argument('--workers', type=int, default=1, help='dump 线程数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dir', help='镜像目录 (默认临时目录)')
+    parser.add_argument('--json', help='结果写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = args.dir or tmp
+        os.makedirs(image_dir, exist_ok=True)
+        report = []
+        print(f"{'classes':>8} {'phase':<9} {'seconds':>9} {'reads':>9} {'bytes':>12}")
+        for scale in args.scales:
+            path = os.path.join(image_dir, f"synthetic_{scale}.img")
+            build_synthetic_image(path, classes=scale, methods=args.methods,
+                                  properties=args.properties, xrefs=args.xrefs,
+                                  seed=args.seed)
+            result = run_benchmark(path, workers=args.workers)
+            for name, r in result['phases'].items():
+                print(f"{result['classes']:>8} {name:<9} {r['seconds']:>9.3f} "
+                      f"{r['read_calls']:>9} {r['read_bytes']:>12}")
+            report.append({'scale': scale, **result})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': report}, f, indent=2)
+        print(f"[+] {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+SQLite 紧凑格式
+
+字符串 (类名、方法名、属性名) 集中存放在 strings 表，其余表只存 id。
+加载是惰性的: 打开时只读取类名列表，访问某个类时才读取它的方法与属性
+"""
+
+import sqlite3
+from collections.abc import Mapping
+
+SCHEMA_VERSION = 1
+
+# 与 MethodBind.flags 相同的位定义
+FLAG_STATIC = 0x01
+FLAG_CONST = 0x100
+FLAG_HAS_RETURN = 0x10000
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE strings (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE);
+CREATE TABLE classes (
+    id INTEGER PRIMARY KEY,
+    name_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    size INTEGER,
+    ci_hash TEXT
+);
+CREATE TABLE methods (
+    id INTEGER PRIMARY KEY,
+    class_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    method_id INTEGER,
+    arg_count INTEGER,
+    default_arg_count INTEGER,
+    flags INTEGER,
+    return_type INTEGER
+);
+CREATE TABLE method_args (
+    method_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    PRIMARY KEY (method_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE properties (
+    class_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    type INTEGER,
+    offset INTEGER,
+    PRIMARY KEY (class_id, idx)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX idx_classes_name ON classes (name_id);
+CREATE INDEX idx_methods_class ON methods (class_id, idx);
+CREATE INDEX idx_methods_name ON methods (name_id);
+"""
+
+
+def save_db(classes: dict, path: str, meta: dict | None = None) -> None:
+    """
+    保存为 SQLite 数据库 (覆盖已有文件)
+
+    Args:
+        classes: dump_classes 的结果
+        meta: 附加信息 (模块名、基址等)，以字符串保存
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("""
+            DROP TABLE IF EXISTS meta;
+            DROP TABLE IF EXISTS strings;
+            DROP TABLE IF EXISTS classes;
+            DROP TABLE IF EXISTS methods;
+            DROP TABLE IF EXISTS method_args;
+            DROP TABLE IF EXISTS properties;
+        """)
+        conn.executescript(SCHEMA)
+
+        strings: dict[str, int] = {}
+
+        def sid(s: str | None) -> int | None:
+            if s is None:
+                return None
+            i = strings.get(s)
+            if i is None:
+                i = strings[s] = len(strings) + 1
+            return i
+
+        class_rows = []
+        method_rows = []
+        arg_rows = []
+        prop_rows = []
+        method_pk = 0
+        for class_pk, cls in enumerate(classes.values(), 1):
+            class_rows.append((
+                class_pk, sid(cls['name']), sid(cls.get('parent')),
+                cls.get('size'), cls.get('ci_hash'),
+            ))
+            for idx, m in enumerate(cls.get('methods', [])):
+                method_pk += 1
+                flags = (
+                    (FLAG_STATIC if m['is_static'] else 0)
+                    | (FLAG_CONST if m['is_const'] else 0)
+                    | (FLAG_HAS_RETURN if m['has_return'] else 0)
+                )
+                method_rows.append((
+                    method_pk, class_pk, idx, sid(m['name']), m['method_id'],
+                    m['arg_count'], m['default_arg_count'], flags, m['return_type'],
+                ))
+                arg_rows.extend((method_pk, i, t) for i, t in enumerate(m['arg_types']))
+            for idx, p in enumerate(cls.get('properties', [])):
+                prop_rows.append((class_pk, idx, sid(p['name']), p['type'], p.get('offset')))
+
+        meta = dict(meta or {})
+        meta['schema_version'] = SCHEMA_VERSION
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+        conn.executemany("INSERT INTO strings VALUES (?, ?)", [(i, s) for s, i in strings.items()])
+        conn.executemany("INSERT INTO classes VALUES (?, ?, ?, ?, ?)", class_rows)
+        conn.executemany("INSERT INTO methods VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", method_rows)
+        conn.executemany("INSERT INTO method_args VALUES (?, ?, ?)", arg_rows)
+        conn.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?)", prop_rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ClassDatabase(Mapping):
+    """
+    惰性加载的类字典 (只读)
+
+    行为与 dump_classes 返回的 dict 相同，访问某个类时才从数据库读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self.meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        if int(self.meta.get('schema_version', 0)) != SCHEMA_VERSION:
+            self._conn.close()
+            raise Exception(f"不支持的数据库版本: {path}")
+
+        rows = self._conn.execute("""
+            SELECT c.id, n.value, p.value, c.size, c.ci_hash
+            FROM classes c
+            JOIN strings n ON n.id = c.name_id
+            LEFT JOIN strings p ON p.id = c.parent_id
+            ORDER BY c.id
+        """).fetchall()
+        self._rows = {name: (class_id, parent, size, ci_hash) for class_id, name, parent, size, ci_hash in rows}
+        self._loaded: dict[str, dict] = {}
+
+    def __getitem__(self, name: str) -> dict:
+        cls = self._loaded.get(name)
+        if cls is None:
+            cls = self._loaded[name] = self._load_class(name)
+        return cls
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, name) -> bool:
+        return name in self._rows
+
+    def parent_of(self, name: str) -> str | None:
+        """不加载整个类即可获取父类名"""
+        return self._rows[name][1]
+
+    def _load_class(self, name: str) -> dict:
+        class_id, parent, size, ci_hash = self._rows[name]
+
+        args: dict[int, list[int]] = {}
+        for method_pk, t in self._conn.execute("""
+            SELECT a.method_id, a.type FROM method_args a
+            JOIN methods m ON m.id = a.method_id
+            WHERE m.class_id = ? ORDER BY a.method_id, a.idx
+        """, (class_id,)):
+            args.setdefault(method_pk, []).append(t)
+
+        methods = []
+        for row in self._conn.execute("""
+            SELECT m.id, s.value, m.method_id, m.arg_count, m.default_arg_count, m.flags, m.return_type
+            FROM methods m JOIN strings s ON s.id = m.name_id
+            WHERE m.class_id = ? ORDER BY m.idx
+        """, (class_id,)):
+            method_pk, m_name, method_id, arg_count, default_arg_count, flags, return_type = row
+            methods.append({
+                'name': m_name,
+                'method_id': method_id,
+                'arg_count': arg_count,
+                'default_arg_count': default_arg_count,
+                'is_static': (flags & FLAG_STATIC) != 0,
+                'is_const': (flags & FLAG_CONST) != 0,
+                'has_return': (flags & FLAG_HAS_RETURN) != 0,
+                'return_type': return_type,
+                'arg_types': args.get(method_pk, []),
+            })
+
+        properties = []
+        for p_name, p_type, offset in self._conn.execute("""
+            SELECT s.value, p.type, p.offset
+            FROM properties p JOIN strings s ON s.id = p.name_id
+            WHERE p.class_id = ? ORDER BY p.idx
+        """, (class_id,)):
+            prop = {'name': p_name, 'type': p_type}
+            if offset is not None:
+                prop['offset'] = offset
+            properties.append(prop)
+
+        cls = {'name': name, 'parent': parent}
+        if ci_hash is not None:
+            cls['ci_hash'] = ci_hash
+        cls['methods'] = methods
+        cls['properties'] = properties
+        if size is not None:
+            cls['size'] = size
+        return cls
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def load_db(path: str) -> ClassDatabase:
+    """打开 save_db 保存的数据库"""
+    return ClassDatabase(path)
@@ -1,118 +1,473 @@
-"""
-主 Dumper 类
-"""
-
-import json
-from .memory import MemoryReader
-from .process import find_godot_process, get_module_info, get_pe_sections
-from .scanner import scan_for_classdb
-from .parser import dump_all_classes, calculate_field_offsets
-from .generator import generate_hpp
-
-
-class GodotDumper:
-    """Godot ClassDB Dumper"""
-    
-    def __init__(self):
-        self.pid: int | None = None
-        self.title: str | None = None
-        self.module_name: str | None = None
-        self.base: int | None = None
-        self.module_size: int | None = None
-        self.reader: MemoryReader | None = None
-        self.sections: list[dict] = []
-        self.classdb_addr: int | None = None
-        self.classdb_offset: int | None = None
-        self.classes: dict = {}
-    
-    def auto_init(self, process_index: int = 0) -> bool:
-        """
-        自动初始化：检测进程、扫描 ClassDB
-        
-        Args:
-            process_index: 当有多个 Godot 进程时选择哪个
-            
-        Returns:
-            bool: 是否成功
-        """
-        # 查找进程
-        processes = find_godot_process()
-        if not processes:
-            print("[-] 未找到 Godot 进程")
-            return False
-        
-        if process_index >= len(processes):
-            process_index = 0
-        
-        proc = processes[process_index]
-        self.pid = proc['pid']
-        self.title = proc['title']
-        
-        # 获取模块信息
-        self.module_name, self.base, self.module_size = get_module_info(self.pid)
-        if not self.base:
-            print("[-] 无法获取模块信息")
-            return False
-        
-        # 创建内存读取器
-        self.reader = MemoryReader(self.pid)
-        
-        # 获取 PE 段
-        self.sections = get_pe_sections(self.reader, self.base)
-        
-        # 扫描 ClassDB
-        candidates = scan_for_classdb(self.reader, self.base, self.module_size, self.sections)
-        if not candidates:
-            print("[-] 未找到 ClassDB::classes")
-            return False
-        
-        # 自动选择包含 Object 的
-        selected = None
-        for c in candidates:
-            names = c['details'].get('sample_names', [])
-            if 'Object' in names:
-                selected = c
-                break
-        
-        if not selected:
-            selected = candidates[0]
-        
-        self.classdb_addr = selected['address']
-        self.classdb_offset = selected['offset']
-        
-        return True
-    
-    def dump_classes(self) -> dict:
-        """
-        提取所有类信息
-        
-        Returns:
-            dict: 类信息字典
-        """
-        if not self.reader or not self.classdb_addr:
-            raise RuntimeError("请先调用 auto_init()")
-        
-        self.classes = dump_all_classes(
-            self.reader, self.classdb_addr, self.base, self.module_size
-        )
-        calculate_field_offsets(self.classes)
-        return self.classes
-    
-    def save_json(self, path: str) -> None:
-        """保存为 JSON 文件"""
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self.classes, f, indent=2, ensure_ascii=False)
-    
-    def save_hpp(self, path: str) -> None:
-        """保存为 C++ 头文件"""
-        content = generate_hpp(self.classes)
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-    
-    def get_stats(self) -> dict:
-        """获取统计信息"""
-        return {
-            'class_count': len(self.classes),
-            'method_count': sum(len(c['methods']) for c in self.classes.values()),
-            'property_count': sum(len(c['properties']) for c in self.classes.values()),
-        }
+"""
+主 Dumper 类
+"""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
+from .backends import MemoryBackend, MemoryImageBackend
+from .memory import MemoryReader
+from .offsets import ClassDBOffsetCache
+from .process import find_godot_process, get_module_info, get_module_sections, get_module_fingerprint
+from .scanner import scan_for_classdb, score_hashmap
+from .parser import dump_all_classes, iter_all_classes, calculate_field_offsets, diff_dumps
+from .ndjson import write_ndjson, read_ndjson
+from .database import save_db, load_db
+from .index import ClassIndex
+from .layout import LayoutEngine
+from .generator import write_hpp, write_split_hpp
+from .snapshot import RecordingBackend, SnapshotBackend, save_snapshot
+from .profiler import Profiler, ProfilingBackend
+from .watch import ClassDBWatcher
+
+
+class GodotDumper:
+    """
+    Godot ClassDB Dumper
+    
+    Args:
+        cache_size: 附加进程时 MemoryReader 页缓存的字节预算，0 表示禁用
+        record: 录制读取过的内存，之后可用 save_snapshot() 保存为快照
+        offset_cache: ClassDB 偏移缓存。True 使用默认路径，str 指定路径，False 禁用
+        scan_processes: 扫描数据段的进程数，大于 1 时使用进程池
+        profile: 记录各阶段耗时与读取统计，见 get_stats()['profile']
+    
+    progress 属性可设置为进度回调 (接收事件 dict)，扫描数据段时调用，
+    回调抛出的异常会中止扫描
+    """
+    
+    def __init__(self, cache_size: int = 0, record: bool = False,
+                 offset_cache: bool | str | ClassDBOffsetCache = True,
+                 scan_processes: int = 1, profile: bool = False):
+        self.cache_size = cache_size
+        self.scan_processes = scan_processes
+        self.record = record
+        self.offset_cache = offset_cache
+        self.profiler: Profiler | None = Profiler() if profile else None
+        self.progress: Callable[[dict], None] | None = None
+        self.fingerprint: str | None = None
+        self.pid: int | None = None
+        self.title: str | None = None
+        self.module_name: str | None = None
+        self.base: int | None = None
+        self.module_size: int | None = None
+        self.reader: MemoryReader | None = None
+        self.sections: list[dict] = []
+        self.classdb_addr: int | None = None
+        self.classdb_offset: int | None = None
+        self.classes: dict = {}
+        self.last_diff: dict | None = None
+        self._index: ClassIndex | None = None
+        self._layout: LayoutEngine | None = None
+    
+    def auto_init(self, process_index: int = 0) -> bool:
+        """
+        自动初始化：检测进程、扫描 ClassDB
+        
+        Args:
+            process_index: 当有多个 Godot 进程时选择哪个
+            
+        Returns:
+            bool: 是否成功
+        """
+        # 查找进程
+        with self._phase('discover'):
+            processes = find_godot_process()
+        if not processes:
+            print("[-] 未找到 Godot 进程")
+            return False
+        
+        if process_index >= len(processes):
+            process_index = 0
+        
+        proc = processes[process_index]
+        return self.attach(proc['pid'], proc['title'])
+    
+    def attach(self, pid: int, title: str | None = None, locate: bool = True) -> bool:
+        """
+        附加到指定进程并扫描 ClassDB
+        
+        Windows 使用 ReadProcessMemory，其他平台使用 /proc/<pid>/mem
+        
+        Args:
+            locate: 为 False 时只解析模块段与指纹，稍后调用 locate_classdb()
+        """
+        self.pid = pid
+        self.title = title
+        
+        # 获取模块信息
+        with self._phase('module'):
+            module_name, base, module_size = get_module_info(pid)
+        if not base:
+            print("[-] 无法获取模块信息")
+            return False
+        
+        # 创建内存读取器
+        reader = MemoryReader(pid, cache_size=self.cache_size)
+        return self.init_with_reader(reader, base, module_size, module_name, locate)
+    
+    def open_image(self, path: str, locate: bool = True) -> bool:
+        """从内存镜像文件初始化 (无需目标进程)"""
+        backend = MemoryImageBackend(path)
+        return self.init_with_reader(
+            backend, backend.base, backend.module_size, os.path.basename(path), locate
+        )
+    
+    def init_with_reader(self, reader: MemoryReader | MemoryBackend, base: int,
+                         module_size: int, module_name: str | None = None,
+                         locate: bool = True) -> bool:
+        """
+        使用任意读取器/后端初始化：解析模块段、计算模块指纹、扫描 ClassDB
+        
+        Args:
+            locate: 为 False 时不扫描 ClassDB，稍后调用 locate_classdb()
+            
+        Returns:
+            bool: 是否成功
+        """
+        if not isinstance(reader, MemoryReader):
+            reader = MemoryReader(backend=reader)
+        self._instrument(reader)
+        if self.record and not isinstance(reader.backend, RecordingBackend):
+            reader.backend = RecordingBackend(reader.backend)
+        self.reader = reader
+        self.base = base
+        self.module_size = module_size
+        self.module_name = module_name
+        
+        # 获取模块段
+        with self._phase('sections'):
+            self.sections = get_module_sections(self.reader, self.base)
+            self.fingerprint = get_module_fingerprint(self.reader, self.base, self.sections)
+        if self.progress:
+            self.progress({'phase': 'sections', 'sections': [s['name'] for s in self.sections]})
+        self.classdb_addr = None
+        self.classdb_offset = None
+        return self.locate_classdb() if locate else True
+    
+    def _phase(self, name: str):
+        """阶段计时 (未启用 profile 时为空操作)"""
+        return self.profiler.phase(name) if self.profiler else nullcontext()
+    
+    def _instrument(self, reader: MemoryReader) -> None:
+        if self.profiler and not isinstance(reader.backend, ProfilingBackend):
+            reader.backend = ProfilingBackend(reader.backend, self.profiler)
+    
+    def locate_classdb(self) -> bool:
+        """
+        定位 ClassDB::classes
+        
+        先查偏移缓存 (按模块指纹)，命中后用一次 score_hashmap 复核；
+        未命中或复核失败时扫描数据段
+        """
+        with self._phase('scan'):
+            return self._locate_classdb()
+    
+    def _locate_classdb(self) -> bool:
+        if self.fingerprint is None:
+            self.fingerprint = get_module_fingerprint(self.reader, self.base, self.sections)
+        cache = self._get_offset_cache()
+        
+        if cache and self.fingerprint:
+            entry = cache.get(self.fingerprint)
+            if entry:
+                addr = self.base + entry['offset']
+                score, details = score_hashmap(self.reader, addr, self.base, self.module_size)
+                if score > 100:
+                    self.classdb_addr = addr
+                    self.classdb_offset = entry['offset']
+                    return True
+                cache.discard(self.fingerprint)
+        
+        # 扫描 ClassDB
+        candidates = scan_for_classdb(
+            self.reader, self.base, self.module_size, self.sections,
+            stop_when_confident=True, processes=self.scan_processes,
+            progress=self.progress
+        )
+        if not candidates:
+            print("[-] 未找到 ClassDB::classes")
+            return False
+        
+        # 自动选择包含 Object 的
+        selected = None
+        for c in candidates:
+            names = c['details'].get('sample_names', [])
+            if 'Object' in names:
+                selected = c
+                break
+        
+        if not selected:
+            selected = candidates[0]
+        
+        self.classdb_addr = selected['address']
+        self.classdb_offset = selected['offset']
+        
+        if cache and self.fingerprint:
+            cache.put(self.fingerprint, selected['offset'], selected['score'], selected['details'])
+        
+        return True
+    
+    def reuse_dump(self, other: 'GodotDumper') -> bool:
+        """
+        复用同一构建 (模块指纹相同) 的另一个 Dumper 的 ClassDB 偏移与 dump 结果
+        
+        偏移相对模块基址，在本进程中用一次 score_hashmap 复核，并要求类数量一致、
+        链表开头的类名都在 other 的结果中 (运行时加载的 GDExtension 可能使同一构建注册不同的类)；
+        类信息与 other 共享，不要原地修改
+        
+        Returns:
+            bool: 指纹不同或复核失败时返回 False
+        """
+        if not self.fingerprint or self.fingerprint != other.fingerprint or other.classdb_offset is None:
+            return False
+        addr = self.base + other.classdb_offset
+        score, details = score_hashmap(self.reader, addr, self.base, self.module_size)
+        if score <= 100 or details.get('size') != len(other.classes):
+            return False
+        if any(name not in other.classes for name in details.get('sample_names', [])):
+            return False
+        self.classdb_addr = addr
+        self.classdb_offset = other.classdb_offset
+        self.classes = other.classes
+        self._layout = other._layout
+        self.last_diff = None
+        return True
+    
+    def _get_offset_cache(self) -> ClassDBOffsetCache | None:
+        if self.offset_cache is False:
+            return None
+        if not isinstance(self.offset_cache, ClassDBOffsetCache):
+            path = self.offset_cache if isinstance(self.offset_cache, str) else None
+            self.offset_cache = ClassDBOffsetCache(path)
+        return self.offset_cache
+    
+    def save_snapshot(self, path: str) -> None:
+        """
+        保存录制的内存快照 (需要 record=True)
+        
+        快照包含读取过的所有页以及模块基址、大小、PE 段、可读区域与 ClassDB 偏移
+        """
+        backend = self.reader.backend if self.reader else None
+        if not isinstance(backend, RecordingBackend):
+            raise RuntimeError("请使用 GodotDumper(record=True) 初始化")
+        
+        meta = {
+            'pid': self.pid,
+            'title': self.title,
+            'module_name': self.module_name,
+            'base': self.base,
+            'module_size': self.module_size,
+            'sections': self.sections,
+            'fingerprint': self.fingerprint,
+            'classdb_offset': self.classdb_offset,
+            'regions': self.reader.regions.ranges() if self.reader.regions else None,
+        }
+        save_snapshot(path, dict(backend.pages), meta)
+    
+    def load_snapshot(self, path: str) -> bool:
+        """
+        回放快照文件 (无需附加进程)
+        
+        快照中记录了 ClassDB 偏移时直接使用，否则重新扫描
+        """
+        backend = SnapshotBackend(path)
+        meta = backend.meta
+        self.reader = MemoryReader(backend=backend)
+        self._instrument(self.reader)
+        self.pid = meta.get('pid')
+        self.title = meta.get('title')
+        self.module_name = meta.get('module_name')
+        self.base = meta['base']
+        self.module_size = meta['module_size']
+        with self._phase('sections'):
+            self.sections = meta.get('sections') or get_module_sections(self.reader, self.base)
+        self.fingerprint = meta.get('fingerprint')
+        
+        if meta.get('classdb_offset') is not None:
+            self.classdb_offset = meta['classdb_offset']
+            self.classdb_addr = self.base + self.classdb_offset
+            return True
+        return self.locate_classdb()
+    
+    def dump_classes(self, workers: int = 1, previous: dict | str | None = None) -> dict:
+        """
+        提取所有类信息
+        
+        Args:
+            workers: 并行解析类成员的线程数
+            previous: 增量模式。上一次的 dump 结果 (或 save_json 保存的文件路径)，
+                      ClassInfo 哈希未变化的类直接复用；变化记录在 last_diff
+            
+        Returns:
+            dict: 类信息字典
+        """
+        if not self.reader or not self.classdb_addr:
+            raise RuntimeError("请先调用 auto_init()")
+        
+        if isinstance(previous, str):
+            with open(previous, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        
+        with self._phase('parse'):
+            classes = dump_all_classes(
+                self.reader, self.classdb_addr, self.base, self.module_size,
+                workers=workers, previous=previous
+            )
+        return self._finish_dump(classes, previous)
+    
+    def _finish_dump(self, classes: dict, previous: dict | None) -> dict:
+        """保存 dump 结果，计算字段偏移与增量差异"""
+        self.classes = classes
+        with self._phase('layout'):
+            self._layout = calculate_field_offsets(self.classes)
+        self.last_diff = diff_dumps(previous, self.classes) if previous is not None else None
+        return self.classes
+    
+    def iter_classes(self, workers: int = 1, previous: dict | None = None):
+        """
+        逐个产出类信息，解析完一个产出一个 (不保存在 self.classes 中)
+        
+        产出的类不含字段偏移，偏移需要完整的继承链，见 save_ndjson
+        """
+        if not self.reader or not self.classdb_addr:
+            raise RuntimeError("请先调用 auto_init()")
+        
+        yield from iter_all_classes(
+            self.reader, self.classdb_addr, self.base, self.module_size,
+            workers=workers, previous=previous
+        )
+    
+    def watch(self, interval: float = 1.0, workers: int = 1,
+              stop: threading.Event | None = None):
+        """
+        保持附加并监视 ClassDB 变化 (生成器)，self.classes 随之更新
+        
+        每次轮询只读取 48 字节的 HashMap 头，头变化时才重新解析新增或变化的类
+        
+        Args:
+            interval: 轮询间隔 (秒)
+            stop: 设置后结束监视
+            
+        Yields:
+            dict: {'event': 'added' | 'removed' | 'changed', 'class': 类名, 'info': 类信息}
+        """
+        watcher = ClassDBWatcher(self, workers)
+        while not (stop and stop.is_set()):
+            yield from watcher.poll()
+            if stop:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
+    
+    def save_ndjson(self, path: str, workers: int = 1) -> int:
+        """
+        边 dump 边写入 NDJSON，每个类一行；字段偏移在之后作为布局记录写入
+        
+        Returns:
+            int: 写入的类数量
+        """
+        with self._phase('parse'):
+            return write_ndjson(self.iter_classes(workers=workers), path)
+    
+    def load_ndjson(self, path: str) -> dict:
+        """读取 save_ndjson 保存的文件到 self.classes"""
+        self.classes = read_ndjson(path)
+        return self.classes
+    
+    def save_json(self, path: str) -> None:
+        """保存为 JSON 文件"""
+        with self._phase('save'):
+            classes = self.classes if isinstance(self.classes, dict) else dict(self.classes)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(classes, f, indent=2, ensure_ascii=False)
+    
+    def save_db(self, path: str) -> None:
+        """保存为 SQLite 数据库 (字符串表 + 索引表)"""
+        with self._phase('save'):
+            save_db(self.classes, path, {
+                'module_name': self.module_name,
+                'fingerprint': self.fingerprint,
+                'classdb_offset': self.classdb_offset,
+            })
+    
+    def load_db(self, path: str):
+        """
+        惰性加载 save_db 保存的数据库到 self.classes
+        
+        只读取类名列表，访问某个类时才读取其方法与属性
+        """
+        self.classes = load_db(path)
+        return self.classes
+    
+    def save_hpp(self, path: str) -> None:
+        """保存为 C++ 头文件 (直接流式写入磁盘)"""
+        with self._phase('generate'), open(path, 'w', encoding='utf-8') as f:
+            write_hpp(self.classes, f)
+    
+    def save_split_hpp(self, out_dir: str, umbrella: str = "GodotSDK.hpp", workers: int = 1) -> list[str]:
+        """每个类保存一个头文件，另生成包含全部类的总头文件"""
+        with self._phase('generate'):
+            return write_split_hpp(self.classes, out_dir, umbrella, workers)
+    
+    @property
+    def index(self) -> ClassIndex:
+        """类信息索引，self.classes 变化后自动重建"""
+        if self._index is None or self._index.classes is not self.classes:
+            self._index = ClassIndex(self.classes)
+        return self._index
+    
+    def layout_of(self, class_name: str) -> dict | None:
+        """
+        类布局: {'name', 'parent', 'size', 'alignment', 'fields': [...]}
+        
+        每个类只计算一次，self.classes 变化后自动重建
+        """
+        if self._layout is None or self._layout.classes is not self.classes:
+            self._layout = LayoutEngine(self.classes)
+        return self._layout.layout_of(class_name)
+    
+    def find_method(self, method_name: str) -> list[str]:
+        """定义了该方法的类"""
+        return self.index.classes_with_method(method_name)
+    
+    def find_by_type(self, type_id: int) -> dict:
+        """
+        使用该 Variant 类型的方法与属性
+        
+        Returns:
+            dict: {'methods': [(类名, 方法名)], 'properties': [(类名, 属性名)]}
+        """
+        return {
+            'methods': self.index.methods_using_type(type_id),
+            'properties': self.index.properties_of_type(type_id),
+        }
+    
+    def subclasses(self, class_name: str, recursive: bool = True) -> list[str]:
+        """子类列表"""
+        return self.index.subclasses(class_name, recursive)
+    
+    def resolved_methods(self, class_name: str) -> dict:
+        """包含继承方法的完整方法集: {方法名: (定义类名, 方法信息)}"""
+        return self.index.resolved_methods(class_name)
+    
+    def get_stats(self) -> dict:
+        """
+        获取统计信息
+        
+        启用 profile 时另含 'profile' (各阶段耗时与读取统计，见 Profiler.report)
+        与 'cache' (页缓存统计)
+        """
+        stats = {
+            'class_count': len(self.classes),
+            'method_count': sum(len(c['methods']) for c in self.classes.values()),
+            'property_count': sum(len(c['properties']) for c in self.classes.values()),
+        }
+        if self.profiler:
+            stats['profile'] = self.profiler.report()
+            if self.reader:
+                stats['cache'] = self.reader.cache_stats()
+        return stats
@@ -1,107 +1,208 @@
-"""
-SDK 生成模块
-"""
-
-from .constants import get_cpp_type
-
-
-def generate_hpp(classes: dict) -> str:
-    """
-    生成 C++ SDK 头文件
-    
-    Args:
-        classes: 类信息字典
-        
-    Returns:
-        str: C++ 头文件内容
-    """
-    lines = []
-    lines.append("// Auto-generated Godot SDK Header")
-    lines.append("// Generated by godot_auto_dumper")
-    lines.append("#pragma once")
-    lines.append("")
-    lines.append("#include <cstdint>")
-    lines.append("")
-    lines.append("namespace Godot {")
-    lines.append("")
-    
-    # 前向声明
-    lines.append("// Forward declarations")
-    for name in sorted(classes.keys()):
-        lines.append(f"class {name};")
-    lines.append("")
-    
-    # 按继承深度排序
-    def get_depth(name: str, depth: int = 0) -> int:
-        if name not in classes:
-            return depth
-        parent = classes[name].get('parent')
-        if parent and parent in classes:
-            return get_depth(parent, depth + 1)
-        return depth
-    
-    sorted_classes = sorted(classes.keys(), key=lambda x: (get_depth(x), x))
-    
-    # 生成类定义
-    for class_name in sorted_classes:
-        cls = classes[class_name]
-        parent = cls.get('parent')
-        methods = cls.get('methods', [])
-        properties = cls.get('properties', [])
-        
-        # 类声明
-        if parent and parent in classes:
-            lines.append(f"class {class_name} : public {parent} {{")
-        else:
-            lines.append(f"class {class_name} {{")
-        
-        lines.append("public:")
-        
-        # 属性
-        if properties:
-            lines.append("    // Properties")
-            sorted_props = sorted(properties, key=lambda x: x.get('offset', 0))
-            
-            # 计算对齐
-            max_decl_len = 0
-            for prop in sorted_props:
-                cpp_type = get_cpp_type(prop['type'])
-                decl = f"{cpp_type} {prop['name']};"
-                max_decl_len = max(max_decl_len, len(decl))
-            
-            for prop in sorted_props:
-                cpp_type = get_cpp_type(prop['type'])
-                offset = prop.get('offset', 0)
-                decl = f"{cpp_type} {prop['name']};"
-                padding = ' ' * (max_decl_len - len(decl) + 1)
-                lines.append(f"    {decl}{padding}// +0x{offset:X}")
-            lines.append("")
-        
-        # 方法
-        if methods:
-            lines.append("    // Methods")
-            for m in sorted(methods, key=lambda x: x['name']):
-                ret_type = get_cpp_type(m['return_type']) if m['has_return'] else "void"
-                
-                args = []
-                for i, t in enumerate(m['arg_types']):
-                    cpp_type = get_cpp_type(t)
-                    if cpp_type not in ('void', 'bool', 'int64_t', 'double', 'Object*', 'RID'):
-                        cpp_type = f"const {cpp_type}&"
-                    args.append(f"{cpp_type} p_{i}")
-                
-                sig = "    "
-                if m['is_static']:
-                    sig += "static "
-                sig += f"{ret_type} {m['name']}({', '.join(args)})"
-                if m['is_const']:
-                    sig += " const"
-                sig += ";"
-                lines.append(sig)
-        
-        lines.append("};")
-        lines.append("")
-    
-    lines.append("} // namespace Godot")
-    
-    return '\n'.join(lines)
+"""
+SDK 生成模块
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .constants import get_cpp_type
+
+HPP_PREAMBLE = [
+    "// Auto-generated Godot SDK Header",
+    "// Generated by godot_auto_dumper",
+    "#pragma once",
+    "",
+    "#include <cstdint>",
+    "",
+]
+
+
+def class_order(classes: dict) -> list[str]:
+    """
+    拓扑顺序: 按继承深度、类名排序，父类总在子类之前
+
+    每个类的深度只计算一次 (记忆化)；继承链中的环在环处截断
+    """
+    depths: dict[str, int] = {}
+    for name in classes:
+        if name in depths:
+            continue
+        # 向上走到根、环或第一个已知深度的祖先，再沿路径回填
+        path = []
+        on_path = set()
+        current = name
+        depth = -1
+        while True:
+            path.append(current)
+            on_path.add(current)
+            parent = classes[current].get('parent')
+            if not parent or parent not in classes or parent in on_path:
+                break
+            if parent in depths:
+                depth = depths[parent]
+                break
+            current = parent
+        for n in reversed(path):
+            depth += 1
+            depths[n] = depth
+    return sorted(classes.keys(), key=lambda x: (depths[x], x))
+
+
+def render_class(cls: dict, parent_known: bool) -> str:
+    """
+    生成单个类定义
+
+    Args:
+        parent_known: 父类是否在 dump 结果中 (决定是否生成继承)
+    """
+    class_name = cls['name']
+    parent = cls.get('parent')
+    methods = cls.get('methods', [])
+    properties = cls.get('properties', [])
+    lines = []
+
+    # 类声明
+    if parent and parent_known:
+        lines.append(f"class {class_name} : public {parent} {{")
+    else:
+        lines.append(f"class {class_name} {{")
+
+    lines.append("public:")
+
+    # 属性
+    if properties:
+        lines.append("    // Properties")
+        sorted_props = sorted(properties, key=lambda x: x.get('offset', 0))
+
+        # 计算对齐
+        max_decl_len = 0
+        for prop in sorted_props:
+            cpp_type = get_cpp_type(prop['type'])
+            decl = f"{cpp_type} {prop['name']};"
+            max_decl_len = max(max_decl_len, len(decl))
+
+        for prop in sorted_props:
+            cpp_type = get_cpp_type(prop['type'])
+            offset = prop.get('offset', 0)
+            decl = f"{cpp_type} {prop['name']};"
+            padding = ' ' * (max_decl_len - len(decl) + 1)
+            lines.append(f"    {decl}{padding}// +0x{offset:X}")
+        lines.append("")
+
+    # 方法
+    if methods:
+        lines.append("    // Methods")
+        for m in sorted(methods, key=lambda x: x['name']):
+            ret_type = get_cpp_type(m['return_type']) if m['has_return'] else "void"
+
+            args = []
+            for i, t in enumerate(m['arg_types']):
+                cpp_type = get_cpp_type(t)
+                if cpp_type not in ('void', 'bool', 'int64_t', 'double', 'Object*', 'RID'):
+                    cpp_type = f"const {cpp_type}&"
+                args.append(f"{cpp_type} p_{i}")
+
+            sig = "    "
+            if m['is_static']:
+                sig += "static "
+            sig += f"{ret_type} {m['name']}({', '.join(args)})"
+            if m['is_const']:
+                sig += " const"
+            sig += ";"
+            lines.append(sig)
+
+    lines.append("};")
+    return '\n'.join(lines)
+
+
+def write_hpp(classes: dict, f) -> None:
+    """
+    将 C++ SDK 头文件直接写入文件对象 (不在内存中拼接整个头文件)
+    """
+    f.write('\n'.join(HPP_PREAMBLE))
+    f.write("\nnamespace Godot {\n\n")
+
+    # 前向声明
+    f.write("// Forward declarations\n")
+    for name in sorted(classes.keys()):
+        f.write(f"class {name};\n")
+    f.write("\n")
+
+    # 按继承顺序生成类定义
+    for class_name in class_order(classes):
+        cls = classes[class_name]
+        parent = cls.get('parent')
+        f.write(render_class(cls, parent in classes if parent else False))
+        f.write("\n\n")
+
+    f.write("} // namespace Godot")
+
+
+def generate_hpp(classes: dict) -> str:
+    """
+    生成 C++ SDK 头文件
+
+    Args:
+        classes: 类信息字典
+
+    Returns:
+        str: C++ 头文件内容
+    """
+    buf = io.StringIO()
+    write_hpp(classes, buf)
+    return buf.getvalue()
+
+
+def _write_class_header(out_dir: str, cls: dict, parent_known: bool) -> str:
+    class_name = cls['name']
+    parent = cls.get('parent')
+    path = os.path.join(out_dir, f"{class_name}.hpp")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(HPP_PREAMBLE[:5]))
+        if parent and parent_known:
+            f.write(f'\n#include "{parent}.hpp"')
+        f.write("\n\nnamespace Godot {\n\n")
+        f.write(render_class(cls, parent_known))
+        f.write("\n\n} // namespace Godot\n")
+    return path
+
+
+def write_split_hpp(classes: dict, out_dir: str, umbrella: str = "GodotSDK.hpp",
+                    workers: int = 1) -> list[str]:
+    """
+    每个类生成一个头文件，并生成按继承顺序包含所有类的总头文件
+
+    Args:
+        out_dir: 输出目录
+        umbrella: 总头文件名
+        workers: 并行生成的进程数
+
+    Returns:
+        list of str: 生成的文件路径 (总头文件在最后)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    order = class_order(classes)
+    jobs = []
+    for class_name in order:
+        cls = classes[class_name]
+        parent = cls.get('parent')
+        jobs.append((cls, parent in classes if parent else False))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(
+                _write_class_header, [out_dir] * len(jobs),
+                [j[0] for j in jobs], [j[1] for j in jobs],
+                chunksize=max(1, len(jobs) // (workers * 4))
+            ))
+    else:
+        paths = [_write_class_header(out_dir, cls, known) for cls, known in jobs]
+
+    umbrella_path = os.path.join(out_dir, umbrella)
+    with open(umbrella_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(HPP_PREAMBLE[:3]))
+        f.write("\n\n")
+        for class_name in order:
+            f.write(f'#include "{class_name}.hpp"\n')
+    paths.append(umbrella_path)
+    return paths
@@ -0,0 +1,139 @@
+"""
+类信息索引
+
+从 dump_classes 的结果一次性构建倒排索引与继承关系，查询为 O(1)/O(k)
+"""
+
+from collections import defaultdict
+
+
+class ClassIndex:
+    """
+    类信息索引
+
+    - 方法名 -> 定义该方法的类
+    - Variant 类型 -> 使用该类型的方法 (返回值或参数) / 属性
+    - 父类 -> 子类
+    - 祖先链与继承后的方法集 (记忆化)
+    """
+
+    def __init__(self, classes: dict):
+        self.classes = classes
+        self.methods_by_name: dict[str, list[str]] = defaultdict(list)
+        self.methods_by_type: dict[int, list[tuple[str, str]]] = defaultdict(list)
+        self.properties_by_type: dict[int, list[tuple[str, str]]] = defaultdict(list)
+        self.children: dict[str, list[str]] = defaultdict(list)
+        self._ancestors: dict[str, tuple[str, ...]] = {}
+        self._resolved: dict[str, dict[str, tuple[str, dict]]] = {}
+
+        for class_name in classes:
+            cls = classes[class_name]
+            parent = cls.get('parent')
+            if parent:
+                self.children[parent].append(class_name)
+
+            for m in cls.get('methods', []):
+                self.methods_by_name[m['name']].append(class_name)
+                types = set(m['arg_types'])
+                if m['has_return']:
+                    types.add(m['return_type'])
+                for t in types:
+                    self.methods_by_type[t].append((class_name, m['name']))
+
+            for p in cls.get('properties', []):
+                self.properties_by_type[p['type']].append((class_name, p['name']))
+
+    def classes_with_method(self, method_name: str) -> list[str]:
+        """定义了该方法的类"""
+        return self.methods_by_name.get(method_name, [])
+
+    def methods_using_type(self, type_id: int) -> list[tuple[str, str]]:
+        """返回值或参数为该 Variant 类型的方法: [(类名, 方法名), ...]"""
+        return self.methods_by_type.get(type_id, [])
+
+    def properties_of_type(self, type_id: int) -> list[tuple[str, str]]:
+        """该 Variant 类型的属性: [(类名, 属性名), ...]"""
+        return self.properties_by_type.get(type_id, [])
+
+    def ancestors(self, class_name: str) -> tuple[str, ...]:
+        """
+        祖先链 (从直接父类到根)，记忆化
+
+        继承链出现环时在环处截断
+        """
+        chain = self._ancestors.get(class_name)
+        if chain is not None:
+            return chain
+
+        # 先向上找到第一个已缓存的祖先，再自顶向下填充
+        path = []
+        on_path = {class_name}
+        current = class_name
+        tail: tuple[str, ...] = ()
+        while True:
+            cls = self.classes.get(current)
+            parent = cls.get('parent') if cls else None
+            if not parent or parent in on_path:
+                break
+            path.append(parent)
+            if parent in self._ancestors:
+                tail = self._ancestors[parent]
+                if class_name in tail:
+                    tail = tail[:tail.index(class_name)]
+                break
+            on_path.add(parent)
+            current = parent
+
+        chain = tuple(path) + tail
+        self._ancestors[class_name] = chain
+        return chain
+
+    def subclasses(self, class_name: str, recursive: bool = True) -> list[str]:
+        """子类列表 (recursive 时按广度优先包含所有后代)"""
+        if not recursive:
+            return list(self.children.get(class_name, []))
+        result = []
+        seen = {class_name}
+        queue = [class_name]
+        for current in queue:
+            for child in self.children.get(current, []):
+                if child not in seen:
+                    seen.add(child)
+                    result.append(child)
+                    queue.append(child)
+        return result
+
+    def subclass_tree(self, class_name: str) -> dict:
+        """子类树: {子类名: {孙类名: {...}}}"""
+        def build(name: str, seen: set) -> dict:
+            tree = {}
+            for child in self.children.get(name, []):
+                if child not in seen:
+                    tree[child] = build(child, seen | {child})
+            return tree
+        return build(class_name, {class_name})
+
+    def resolved_methods(self, class_name: str) -> dict[str, tuple[str, dict]]:
+        """
+        包含继承方法的完整方法集，子类覆盖父类同名方法，记忆化
+
+        Returns:
+            dict: {方法名: (定义类名, 方法信息)}
+        """
+        resolved = self._resolved.get(class_name)
+        if resolved is not None:
+            return resolved
+
+        resolved = {}
+        for owner in reversed((class_name,) + self.ancestors(class_name)):
+            cls = self.classes.get(owner)
+            if not cls:
+                continue
+            for m in cls.get('methods', []):
+                resolved[m['name']] = (owner, m)
+
+        self._resolved[class_name] = resolved
+        return resolved
+
+    def is_subclass(self, class_name: str, base_name: str) -> bool:
+        return class_name == base_name or base_name in self.ancestors(class_name)
@@ -0,0 +1,108 @@
+"""
+类布局计算
+
+按拓扑顺序 (父类先于子类) 计算每个类的大小与字段偏移，每个类只计算一次。
+字段按类型自然对齐，类大小向上对齐到类的最大对齐
+"""
+
+from .constants import ROOT_CLASS_SIZE, get_type_size, get_type_alignment
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+
+class LayoutEngine:
+    """
+    类布局引擎
+
+    继承链中的环会被显式检测并记录在 cycles 中，环上的类按根类处理
+    """
+
+    def __init__(self, classes: dict):
+        self.classes = classes
+        self.cycles: list[list[str]] = []
+        self._layouts: dict[str, dict] = {}
+        # 环被截断处的类 (按根类处理)
+        self._cut: set[str] = set()
+
+    def _parent_of(self, name: str) -> str | None:
+        if name in self._cut:
+            return None
+        parent = self.classes[name].get('parent')
+        return parent if parent and parent in self.classes else None
+
+    def _topological_path(self, name: str) -> list[str]:
+        """从 name 向上直到已计算的祖先或根，返回需要计算的类 (父类在前)"""
+        while True:
+            path = []
+            on_path = {}
+            current = name
+            while current is not None and current not in self._layouts:
+                if current in on_path:
+                    # 显式检测到环: 记录并把环的入口当作根，然后重新遍历
+                    self.cycles.append(path[on_path[current]:])
+                    self._cut.add(current)
+                    break
+                on_path[current] = len(path)
+                path.append(current)
+                current = self._parent_of(current)
+            else:
+                return list(reversed(path))
+
+    def _compute(self, name: str) -> dict:
+        cls = self.classes[name]
+        parent = self._parent_of(name)
+        if parent is not None:
+            parent_layout = self._layouts[parent]
+            offset = parent_layout['size']
+            alignment = parent_layout['alignment']
+        else:
+            offset = ROOT_CLASS_SIZE
+            alignment = 8
+
+        fields = []
+        for prop in cls.get('properties', []):
+            size = get_type_size(prop['type'])
+            field_align = get_type_alignment(prop['type'])
+            offset = _align(offset, field_align)
+            fields.append({
+                'name': prop.get('name'),
+                'type': prop['type'],
+                'offset': offset,
+                'size': size,
+                'alignment': field_align,
+            })
+            offset += size
+            alignment = max(alignment, field_align)
+
+        return {
+            'name': name,
+            'parent': parent,
+            'size': _align(offset, alignment),
+            'alignment': alignment,
+            'fields': fields,
+        }
+
+    def layout_of(self, class_name: str) -> dict | None:
+        """
+        获取类布局
+
+        Returns:
+            dict: {'name', 'parent', 'size', 'alignment',
+                   'fields': [{'name', 'type', 'offset', 'size', 'alignment'}]}
+            类不存在时返回 None
+        """
+        if class_name not in self.classes:
+            return None
+        layout = self._layouts.get(class_name)
+        if layout is None:
+            for name in self._topological_path(class_name):
+                if name not in self._layouts:
+                    self._layouts[name] = self._compute(name)
+            layout = self._layouts[class_name]
+        return layout
+
+    def compute_all(self) -> None:
+        for name in self.classes:
+            self.layout_of(name)
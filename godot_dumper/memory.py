@@ -1,116 +1,407 @@
-"""
-内存读取模块
-"""
-
-import ctypes
-from ctypes import wintypes
-import struct
-
-PROCESS_VM_READ = 0x0010
-PROCESS_QUERY_INFORMATION = 0x0400
-
-kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
-
-OpenProcess = kernel32.OpenProcess
-OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
-OpenProcess.restype = wintypes.HANDLE
-
-ReadProcessMemory = kernel32.ReadProcessMemory
-ReadProcessMemory.argtypes = [
-    wintypes.HANDLE, ctypes.c_uint64, wintypes.LPVOID,
-    ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)
-]
-ReadProcessMemory.restype = wintypes.BOOL
-
-CloseHandle = kernel32.CloseHandle
-
-
-class MemoryReader:
-    """跨进程内存读取器"""
-    
-    def __init__(self, pid: int):
-        self.pid = pid
-        self.handle = OpenProcess(PROCESS_VM_READ | PROCESS_QUERY_INFORMATION, False, pid)
-        if not self.handle:
-            raise Exception(f"无法打开进程 {pid}")
-    
-    def __del__(self):
-        if hasattr(self, 'handle') and self.handle:
-            CloseHandle(self.handle)
-    
-    def read_bytes(self, address: int, size: int) -> bytes | None:
-        buffer = ctypes.create_string_buffer(size)
-        bytes_read = ctypes.c_size_t()
-        if not ReadProcessMemory(self.handle, address, buffer, size, ctypes.byref(bytes_read)):
-            return None
-        return buffer.raw[:bytes_read.value]
-    
-    def read_qword(self, address: int) -> int | None:
-        data = self.read_bytes(address, 8)
-        return struct.unpack('<Q', data)[0] if data and len(data) == 8 else None
-    
-    def read_dword(self, address: int) -> int | None:
-        data = self.read_bytes(address, 4)
-        return struct.unpack('<I', data)[0] if data and len(data) == 4 else None
-
-
-def is_valid_pointer(ptr: int, base: int, module_size: int) -> bool:
-    """检查是否是有效指针"""
-    if ptr < 0x10000:
-        return False
-    if base <= ptr < base + module_size:
-        return True
-    if 0x10000 < ptr < 0x7FFFFFFFFFFF:
-        return True
-    return False
-
-
-def read_cstring(reader: MemoryReader, address: int, max_len: int = 128) -> str | None:
-    """读取 C 字符串"""
-    if not address or address < 0x10000:
-        return None
-    data = reader.read_bytes(address, max_len)
-    if not data:
-        return None
-    try:
-        null_idx = data.index(0)
-        s = data[:null_idx].decode('utf-8', errors='ignore')
-        return s if s.isprintable() and len(s) > 0 else None
-    except:
-        return None
-
-
-def read_stringname(reader: MemoryReader, ptr: int, base: int, module_size: int) -> str | None:
-    """读取 Godot StringName"""
-    if not is_valid_pointer(ptr, base, module_size):
-        return None
-    
-    sn_data = reader.read_bytes(ptr, 32)
-    if not sn_data or len(sn_data) < 24:
-        return None
-    
-    cname_ptr = struct.unpack('<Q', sn_data[8:16])[0]
-    name_ptr = struct.unpack('<Q', sn_data[16:24])[0]
-    
-    # 优先尝试 cname
-    if is_valid_pointer(cname_ptr, base, module_size):
-        name = read_cstring(reader, cname_ptr)
-        if name:
-            return name
-    
-    # 尝试 UTF-32
-    if is_valid_pointer(name_ptr, base, module_size):
-        utf32_data = reader.read_bytes(name_ptr, 256)
-        if utf32_data:
-            chars = []
-            for i in range(0, len(utf32_data), 4):
-                if i + 4 > len(utf32_data):
-                    break
-                val = struct.unpack('<I', utf32_data[i:i+4])[0]
-                if val == 0:
-                    break
-                if val < 0x110000:
-                    chars.append(chr(val))
-            if chars:
-                return ''.join(chars)
-    return None
+"""
+内存读取模块
+"""
+
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from .backends import MemoryBackend, open_process_backend
+from .regions import RegionMap
+
+PAGE_SIZE = 0x1000
+
+# 超过此大小的读取不经过页缓存 (如整段读取)
+CACHE_MAX_READ = 0x10000
+
+# read_many 合并读取: 间隔不超过此值的范围合并为一次读取
+READ_MERGE_GAP = 256
+READ_MERGE_MAX = 0x100000
+
+# 字符串读取: 首次读取 STRING_READ_MIN 字节，未找到终止符时按倍数增长，
+# 每次读取不跨页；最长 STRING_MAX_LEN 个字符
+STRING_READ_MIN = 64
+STRING_MAX_LEN = 0x1000
+
+# read_stringnames 批量读取 cname 的大小，未找到终止符的再单独读取
+CNAME_BATCH_READ = 128
+
+
+class StringNameCache:
+    """
+    StringName 解析缓存 (指针 -> 字符串) 与字符串驻留表
+    
+    挂在 MemoryReader 上，scanner 与 parser 共享，
+    同一个 StringName 在一次会话中只从目标读取一次
+    """
+    
+    def __init__(self):
+        self.names: dict[int, str | None] = {}
+        self.strings: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def intern(self, s: str) -> str:
+        """返回驻留后的字符串"""
+        interned = self.strings.get(s)
+        if interned is None:
+            interned = self.strings[s] = sys.intern(s)
+        return interned
+    
+    def clear(self) -> None:
+        self.names.clear()
+        self.strings.clear()
+
+
+class MemoryReader:
+    """
+    跨进程内存读取器
+    
+    实际读取由后端完成 (ReadProcessMemory、/proc/<pid>/mem、内存镜像)
+    
+    Args:
+        cache_size: 页缓存字节预算，0 表示禁用。按 4 KiB 页缓存，LRU 淘汰
+    """
+    
+    def __init__(self, pid: int | None = None, backend: MemoryBackend | None = None,
+                 cache_size: int = 0):
+        if backend is None:
+            if pid is None:
+                raise ValueError("需要 pid 或 backend")
+            backend = open_process_backend(pid)
+        self.pid = pid if pid is not None else getattr(backend, 'pid', None)
+        self.backend = backend
+        
+        self.cache_pages = cache_size // PAGE_SIZE
+        self._pages: OrderedDict[int, bytes] = OrderedDict()
+        self._pages_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stringnames = StringNameCache()
+        self.regions = RegionMap.from_backend(backend)
+    
+    def refresh_regions(self) -> None:
+        """重新获取可读区域 (目标分配或释放了内存后)"""
+        self.regions = RegionMap.from_backend(self.backend)
+    
+    def __del__(self):
+        if hasattr(self, 'backend') and self.backend:
+            self.backend.close()
+    
+    def read_bytes(self, address: int, size: int) -> bytes | None:
+        if not self.cache_pages or size <= 0 or size > CACHE_MAX_READ:
+            return self.backend.read(address, size)
+        
+        first = address // PAGE_SIZE
+        last = (address + size - 1) // PAGE_SIZE
+        pages = []
+        hit = True
+        for index in range(first, last + 1):
+            page, cached = self._get_page(index)
+            if page is None:
+                # 页不可读时退回直接读取 (可能只跨入了不可读页的一部分)
+                self._count_lookup(False)
+                return self.backend.read(address, size)
+            pages.append(page)
+            hit = hit and cached
+        self._count_lookup(hit)
+        
+        offset = address - first * PAGE_SIZE
+        if len(pages) == 1:
+            return pages[0][offset:offset + size]
+        return b''.join(pages)[offset:offset + size]
+    
+    def _get_page(self, index: int) -> tuple[bytes | None, bool]:
+        """返回 (页数据, 是否来自缓存)"""
+        with self._pages_lock:
+            page = self._pages.get(index)
+            if page is not None:
+                self._pages.move_to_end(index)
+                return page, True
+        
+        page = self.backend.read(index * PAGE_SIZE, PAGE_SIZE)
+        if not page or len(page) != PAGE_SIZE:
+            return None, False
+        with self._pages_lock:
+            self._pages[index] = page
+            if len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+        return page, False
+    
+    def _count_lookup(self, hit: bool) -> None:
+        with self._pages_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+    
+    def cache_stats(self) -> dict:
+        """页缓存统计 (每次经过缓存的 read_bytes 计一次: 所有页都已缓存为命中，否则为未命中)"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'pages': len(self._pages),
+            'capacity_pages': self.cache_pages,
+        }
+    
+    def read_view(self, address: int, size: int) -> bytes | memoryview | None:
+        """
+        大块读取 (整段扫描)
+        
+        后端提供 view() 时 (内存镜像) 返回零拷贝 memoryview，否则同 read_bytes
+        """
+        view = getattr(self.backend, 'view', None)
+        if view is not None:
+            return view(address, size)
+        return self.read_bytes(address, size)
+    
+    def clear_cache(self) -> None:
+        """清空页缓存 (目标内存变化后调用)"""
+        with self._pages_lock:
+            self._pages.clear()
+    
+    def read_many(self, requests: list[tuple[int, int]], max_gap: int = READ_MERGE_GAP) -> list[bytes | None]:
+        """
+        批量读取 (scatter-gather)
+        
+        相邻、重叠或间隔很小的范围合并为一次读取；合并读取失败时
+        退回逐个读取，单个失败的请求返回 None
+        
+        Args:
+            requests: [(address, size), ...]
+            
+        Returns:
+            list: 与 requests 一一对应的数据
+        """
+        results: list[bytes | None] = [None] * len(requests)
+        order = sorted(
+            (i for i, (addr, size) in enumerate(requests) if addr and size > 0),
+            key=lambda i: requests[i][0]
+        )
+        
+        group: list[int] = []
+        group_start = group_end = 0
+        for i in order:
+            addr, size = requests[i]
+            if group and addr <= group_end + max_gap and max(group_end, addr + size) - group_start <= READ_MERGE_MAX:
+                group.append(i)
+                group_end = max(group_end, addr + size)
+                continue
+            if group:
+                self._read_group(requests, group, group_start, group_end, results)
+            group = [i]
+            group_start, group_end = addr, addr + size
+        if group:
+            self._read_group(requests, group, group_start, group_end, results)
+        
+        return results
+    
+    def _read_group(self, requests, group, start, end, results) -> None:
+        if len(group) == 1:
+            addr, size = requests[group[0]]
+            results[group[0]] = self.read_bytes(addr, size)
+            return
+        
+        data = self.read_bytes(start, end - start)
+        if data and len(data) == end - start:
+            for i in group:
+                addr, size = requests[i]
+                results[i] = data[addr - start:addr - start + size]
+            return
+        
+        for i in group:
+            addr, size = requests[i]
+            results[i] = self.read_bytes(addr, size)
+    
+    def read_qword(self, address: int) -> int | None:
+        data = self.read_bytes(address, 8)
+        return struct.unpack('<Q', data)[0] if data and len(data) == 8 else None
+    
+    def read_dword(self, address: int) -> int | None:
+        data = self.read_bytes(address, 4)
+        return struct.unpack('<I', data)[0] if data and len(data) == 4 else None
+
+
+def is_valid_pointer(ptr: int, base: int, module_size: int,
+                     regions: RegionMap | None = None) -> bool:
+    """
+    检查是否是有效指针
+
+    有区域表时检查指针是否落在可读区域内，否则只检查地址范围
+    """
+    if ptr < 0x10000:
+        return False
+    if regions is not None:
+        return regions.contains(ptr)
+    if base <= ptr < base + module_size:
+        return True
+    if 0x10000 < ptr < 0x7FFFFFFFFFFF:
+        return True
+    return False
+
+
+def _find_terminator(buf: bytearray, width: int, start: int) -> int:
+    """查找按 width 对齐的全零终止符，返回下标或 -1"""
+    if width == 1:
+        return buf.find(0, start)
+    zero = bytes(width)
+    i = buf.find(zero, start)
+    while i >= 0 and i % width:
+        i = buf.find(zero, i + width - i % width)
+    return i
+
+
+def read_terminated(reader: MemoryReader, address: int, width: int = 1,
+                    max_len: int = STRING_MAX_LEN) -> bytes | None:
+    """
+    读取以全零单元结尾的数据 (不含终止符)
+    
+    首次读取 STRING_READ_MIN 字节，未找到终止符时读取量按倍数增长；
+    每次读取都截止在页边界，字符串之后的页不可读时不影响结果
+    
+    Args:
+        width: 字符单元字节数 (C 字符串为 1，UTF-32 为 4)
+        max_len: 最多字符数
+    
+    Returns:
+        bytes: 终止符之前的数据；读取失败或 max_len 内没有终止符时返回 None
+    """
+    limit = max_len * width
+    buf = bytearray()
+    size = STRING_READ_MIN
+    addr = address
+    while len(buf) < limit:
+        n = min(size, PAGE_SIZE - addr % PAGE_SIZE, limit - len(buf))
+        chunk = reader.read_bytes(addr, n)
+        if not chunk:
+            return None
+        checked = len(buf) - len(buf) % width
+        buf += chunk
+        idx = _find_terminator(buf, width, checked)
+        if idx >= 0:
+            return bytes(buf[:idx])
+        if len(chunk) < n:
+            return None
+        addr += n
+        size *= 2
+    return None
+
+
+def read_cstring(reader: MemoryReader, address: int, max_len: int = STRING_MAX_LEN) -> str | None:
+    """读取 C 字符串"""
+    if not address or address < 0x10000:
+        return None
+    data = read_terminated(reader, address, 1, max_len)
+    return _decode_utf8(data) if data is not None else None
+
+
+def read_utf32(reader: MemoryReader, address: int, max_len: int = STRING_MAX_LEN) -> str | None:
+    """读取以 0 结尾的 UTF-32 字符串 (Godot String)"""
+    if not address or address < 0x10000:
+        return None
+    data = read_terminated(reader, address, 4, max_len)
+    if not data:
+        return None
+    return data.decode('utf-32-le', errors='ignore') or None
+
+
+def _decode_utf8(data: bytes) -> str | None:
+    s = data.decode('utf-8', errors='ignore')
+    return s if s.isprintable() and len(s) > 0 else None
+
+
+def _decode_cstring(data: bytes | None) -> str | None:
+    if not data:
+        return None
+    null_idx = data.find(0)
+    if null_idx < 0:
+        return None
+    return _decode_utf8(data[:null_idx])
+
+
+def read_stringname(reader: MemoryReader, ptr: int, base: int, module_size: int) -> str | None:
+    """读取 Godot StringName (按指针缓存，返回驻留字符串)"""
+    if not is_valid_pointer(ptr, base, module_size, getattr(reader, 'regions', None)):
+        return None
+    
+    cache = getattr(reader, 'stringnames', None)
+    if cache is None:
+        return _read_stringname(reader, ptr, base, module_size)
+    
+    try:
+        name = cache.names[ptr]
+        cache.hits += 1
+        return name
+    except KeyError:
+        pass
+    
+    cache.misses += 1
+    name = _read_stringname(reader, ptr, base, module_size)
+    if name is not None:
+        name = cache.intern(name)
+    cache.names[ptr] = name
+    return name
+
+
+def read_stringnames(reader: MemoryReader, ptrs: list[int], base: int, module_size: int) -> list[str | None]:
+    """
+    批量读取 StringName
+    
+    未缓存的 StringName 头与 cname 各用一次 read_many 读取，
+    其余 (UTF-32 名称) 逐个回退到 read_stringname
+    """
+    cache = getattr(reader, 'stringnames', None)
+    if cache is None or not hasattr(reader, 'read_many'):
+        return [read_stringname(reader, p, base, module_size) for p in ptrs]
+    
+    # 本次批量读取解析的指针，首次出现时计为未命中 (之后的重复出现为命中)
+    fetched = set()
+    regions = reader.regions
+    pending = sorted({
+        p for p in ptrs
+        if p not in cache.names and is_valid_pointer(p, base, module_size, regions)
+    })
+    if pending:
+        headers = reader.read_many([(p, 32) for p in pending])
+        cname_ptrs = []
+        for p, sn_data in zip(pending, headers):
+            cname_ptr = struct.unpack('<Q', sn_data[8:16])[0] if sn_data and len(sn_data) >= 24 else 0
+            cname_ptrs.append(cname_ptr if is_valid_pointer(cname_ptr, base, module_size, regions) else 0)
+        
+        cnames = reader.read_many([(c, CNAME_BATCH_READ) for c in cname_ptrs])
+        for p, c, data in zip(pending, cname_ptrs, cnames):
+            name = _decode_cstring(data) if c else None
+            if name:
+                cache.names[p] = cache.intern(name)
+                fetched.add(p)
+    
+    names = []
+    for p in ptrs:
+        if p in fetched:
+            fetched.discard(p)
+            cache.misses += 1
+            names.append(cache.names[p])
+        else:
+            names.append(read_stringname(reader, p, base, module_size))
+    return names
+
+
+def _read_stringname(reader: MemoryReader, ptr: int, base: int, module_size: int) -> str | None:
+    sn_data = reader.read_bytes(ptr, 32)
+    if not sn_data or len(sn_data) < 24:
+        return None
+    
+    cname_ptr = struct.unpack('<Q', sn_data[8:16])[0]
+    name_ptr = struct.unpack('<Q', sn_data[16:24])[0]
+    regions = getattr(reader, 'regions', None)
+    
+    # 优先尝试 cname
+    if is_valid_pointer(cname_ptr, base, module_size, regions):
+        name = read_cstring(reader, cname_ptr)
+        if name:
+            return name
+    
+    # 尝试 UTF-32
+    if is_valid_pointer(name_ptr, base, module_size, regions):
+        return read_utf32(reader, name_ptr)
+    return None
@@ -0,0 +1,109 @@
+"""
+多目标并发 dump
+
+同时附加多个进程 (或内存镜像)，按模块指纹分组：每个不同的构建只扫描、解析一次，
+同一构建的其他进程复用其 ClassDB 偏移与类信息
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from .dumper import GodotDumper
+from .offsets import ClassDBOffsetCache
+from .process import find_godot_process
+
+
+def _open_target(target: dict, dumper_kwargs: dict) -> dict:
+    dumper = GodotDumper(**dumper_kwargs)
+    result = {
+        'pid': target.get('pid'),
+        'title': target.get('title'),
+        'image': target.get('image'),
+        'fingerprint': None,
+        'dumper': dumper,
+        'reused_from': None,
+        'error': None,
+    }
+    try:
+        if target.get('image'):
+            ok = dumper.open_image(target['image'], locate=False)
+        else:
+            ok = dumper.attach(target['pid'], target.get('title'), locate=False)
+    except Exception as e:
+        ok = False
+        result['error'] = str(e)
+    if not ok:
+        result['error'] = result['error'] or "无法附加"
+        return result
+    result['fingerprint'] = dumper.fingerprint
+    return result
+
+
+def _dump_group(group: list[dict], workers: int) -> None:
+    """
+    组内第一个成功 dump 的目标作为主目标，其余复用；
+    复用复核失败 (类集合不同) 时单独 dump，以主目标的结果做增量
+    """
+    leader = None
+    for result in group:
+        dumper = result['dumper']
+        try:
+            if leader and dumper.reuse_dump(leader['dumper']):
+                result['reused_from'] = leader['pid'] if leader['pid'] is not None else leader['image']
+                continue
+            if not dumper.locate_classdb():
+                result['error'] = "未找到 ClassDB::classes"
+                continue
+            dumper.dump_classes(workers=workers, previous=leader['dumper'].classes if leader else None)
+        except Exception as e:
+            result['error'] = str(e)
+            continue
+        if leader is None:
+            leader = result
+
+
+def dump_processes(targets: list[dict] | None = None, max_workers: int = 4,
+                   workers: int = 1, **dumper_kwargs) -> list[dict]:
+    """
+    并发 dump 多个目标
+
+    Args:
+        targets: [{'pid', 'title'}, ...] 或 [{'image': 路径}, ...]，
+                 None 时使用 find_godot_process() 找到的所有进程
+        max_workers: 同时处理的目标 (构建) 数
+        workers: 每个目标解析类成员的线程数
+        dumper_kwargs: 传给 GodotDumper 的参数 (偏移缓存在所有目标间共享)
+
+    Returns:
+        list of dict: 每个输入目标一项，与 targets 顺序一致 (重复的目标共享同一结果)
+            [{'pid', 'title', 'image', 'fingerprint', 'dumper', 'reused_from', 'error'}, ...]
+            reused_from 为复用其结果的目标 (pid 或镜像路径)，error 为 None 表示成功
+    """
+    if targets is None:
+        targets = find_godot_process()
+
+    # 同一进程可能有多个 Engine 窗口
+    unique = []
+    index = {}
+    for target in targets:
+        key = target.get('image') or target.get('pid')
+        if key not in index:
+            index[key] = len(unique)
+            unique.append(target)
+
+    offset_cache = dumper_kwargs.get('offset_cache', True)
+    if offset_cache is not False and not isinstance(offset_cache, ClassDBOffsetCache):
+        dumper_kwargs['offset_cache'] = ClassDBOffsetCache(
+            offset_cache if isinstance(offset_cache, str) else None
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda t: _open_target(t, dumper_kwargs), unique))
+
+        # 按模块指纹分组，没有指纹的目标各自一组
+        groups: dict[str, list[dict]] = {}
+        for i, result in enumerate(results):
+            if result['error'] is None:
+                groups.setdefault(result['fingerprint'] or f"#{i}", []).append(result)
+
+        list(pool.map(lambda g: _dump_group(g, workers), groups.values()))
+
+    return [results[index[t.get('image') or t.get('pid')]] for t in targets]
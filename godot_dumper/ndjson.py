@@ -0,0 +1,83 @@
+"""
+NDJSON 流式输出
+
+文件格式 (每行一个 JSON 对象):
+    1. 类记录: 与 save_json 中的类信息相同，但不含字段偏移，解析完一个写一行
+    2. 布局记录: {"layout": 类名, "size": 类大小, "offsets": [每个属性的偏移]}
+       在所有类记录之后由第二遍流式写入
+"""
+
+import json
+from .parser import calculate_field_offsets
+
+
+def write_ndjson(classes, path: str) -> int:
+    """
+    逐行写入类记录，随后写入布局记录
+
+    只保留计算布局所需的精简表 (父类与属性类型)，内存占用与方法数无关
+
+    Args:
+        classes: 类信息的可迭代对象 (如 GodotDumper.iter_classes())
+
+    Returns:
+        int: 写入的类数量
+    """
+    layout = {}
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for cls in classes:
+            f.write(json.dumps(cls, ensure_ascii=False))
+            f.write('\n')
+            f.flush()
+            layout[cls['name']] = {
+                'parent': cls.get('parent'),
+                'properties': [{'type': p['type']} for p in cls.get('properties', [])],
+            }
+            count += 1
+
+        # 第二遍: 字段偏移
+        calculate_field_offsets(layout)
+        for name, cls in layout.items():
+            record = {
+                'layout': name,
+                'size': cls['size'],
+                'offsets': [p['offset'] for p in cls['properties']],
+            }
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+
+    return count
+
+
+def iter_ndjson(path: str):
+    """逐行读取类记录 (不含字段偏移)，布局记录被跳过"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'layout' not in record:
+                yield record
+
+
+def read_ndjson(path: str) -> dict:
+    """读取 NDJSON 文件并合并布局记录，返回与 dump_classes 相同的字典"""
+    classes = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'layout' in record:
+                cls = classes.get(record['layout'])
+                if cls is None:
+                    continue
+                cls['size'] = record['size']
+                for prop, offset in zip(cls['properties'], record['offsets']):
+                    prop['offset'] = offset
+            else:
+                classes[record['name']] = record
+    return classes
@@ -0,0 +1,62 @@
+"""
+ClassDB 偏移持久化缓存
+
+按模块指纹记录 ClassDB::classes 的偏移，同一构建重复 dump 时跳过全量扫描
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'godot_dumper', 'classdb_offsets.json'
+)
+
+
+class ClassDBOffsetCache:
+    """
+    指纹 -> ClassDB 偏移 的磁盘缓存 (JSON)
+
+    Args:
+        path: 缓存文件路径，默认 ~/.cache/godot_dumper/classdb_offsets.json
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.environ.get('GODOT_DUMPER_CACHE') or DEFAULT_CACHE_PATH
+        self.entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, fingerprint: str) -> dict | None:
+        """返回 {'offset', 'score', 'details'}，未命中返回 None"""
+        return self.entries.get(fingerprint)
+
+    def put(self, fingerprint: str, offset: int, score: int, details: dict) -> None:
+        """记录偏移并写回磁盘"""
+        with self._lock:
+            self.entries[fingerprint] = {
+                'offset': offset,
+                'score': score,
+                'details': details,
+            }
+            self.save()
+
+    def discard(self, fingerprint: str) -> None:
+        with self._lock:
+            if self.entries.pop(fingerprint, None) is not None:
+                self.save()
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -1,192 +1,380 @@
-"""
-ClassDB 解析模块
-"""
-
-import struct
-from .memory import MemoryReader, is_valid_pointer, read_stringname
-from .constants import (
-    CLASSINFO_METHOD_MAP_OFFSET,
-    CLASSINFO_PROP_SETGET_OFFSET,
-    CLASSINFO_INHERITS_OFFSET,
-    CLASSINFO_NAME_OFFSET,
-    get_type_size,
-)
-
-
-def parse_method(reader: MemoryReader, addr: int, base: int, module_size: int) -> dict | None:
-    """解析 MethodBind 结构"""
-    data = reader.read_bytes(addr, 80)
-    if not data:
-        return None
-    
-    method_id = struct.unpack('<i', data[8:12])[0]
-    name_ptr = struct.unpack('<Q', data[16:24])[0]
-    default_arg_count = struct.unpack('<i', data[48:52])[0]
-    arg_count = struct.unpack('<i', data[52:56])[0]
-    flags = struct.unpack('<I', data[56:60])[0]
-    arg_types_ptr = struct.unpack('<Q', data[64:72])[0]
-    
-    name = read_stringname(reader, name_ptr, base, module_size)
-    if not name:
-        return None
-    
-    return_type = 0
-    arg_types = []
-    if is_valid_pointer(arg_types_ptr, base, module_size) and 0 <= arg_count < 30:
-        types_data = reader.read_bytes(arg_types_ptr, (arg_count + 1) * 4)
-        if types_data and len(types_data) >= (arg_count + 1) * 4:
-            return_type = struct.unpack('<i', types_data[0:4])[0]
-            for i in range(arg_count):
-                t = struct.unpack('<i', types_data[(i+1)*4:(i+2)*4])[0]
-                arg_types.append(t)
-    
-    return {
-        'name': name,
-        'method_id': method_id,
-        'arg_count': arg_count,
-        'default_arg_count': default_arg_count,
-        'is_static': (flags & 0x01) != 0,
-        'is_const': (flags & 0x100) != 0,
-        'has_return': (flags & 0x10000) != 0,
-        'return_type': return_type,
-        'arg_types': arg_types,
-    }
-
-
-def dump_class_methods(reader: MemoryReader, ci_data: bytes, base: int, module_size: int) -> list[dict]:
-    """提取类的所有方法"""
-    mm_head = struct.unpack('<Q', ci_data[CLASSINFO_METHOD_MAP_OFFSET+16:CLASSINFO_METHOD_MAP_OFFSET+24])[0]
-    mm_size = struct.unpack('<I', ci_data[CLASSINFO_METHOD_MAP_OFFSET+36:CLASSINFO_METHOD_MAP_OFFSET+40])[0]
-    
-    methods = []
-    current = mm_head
-    count = 0
-    
-    while current and count < mm_size + 10:
-        elem_data = reader.read_bytes(current, 32)
-        if not elem_data:
-            break
-        next_ptr = struct.unpack('<Q', elem_data[0:8])[0]
-        value_ptr = struct.unpack('<Q', elem_data[24:32])[0]
-        if is_valid_pointer(value_ptr, base, module_size):
-            mb = parse_method(reader, value_ptr, base, module_size)
-            if mb:
-                methods.append(mb)
-        current = next_ptr
-        count += 1
-        if not next_ptr:
-            break
-    
-    return methods
-
-
-def dump_class_properties(reader: MemoryReader, ci_data: bytes, base: int, module_size: int) -> list[dict]:
-    """提取类的所有属性"""
-    prop_head = struct.unpack('<Q', ci_data[CLASSINFO_PROP_SETGET_OFFSET+16:CLASSINFO_PROP_SETGET_OFFSET+24])[0]
-    prop_size = struct.unpack('<I', ci_data[CLASSINFO_PROP_SETGET_OFFSET+36:CLASSINFO_PROP_SETGET_OFFSET+40])[0]
-    
-    properties = []
-    current = prop_head
-    count = 0
-    
-    while current and count < prop_size + 10:
-        elem_data = reader.read_bytes(current, 80)
-        if not elem_data:
-            break
-        next_ptr = struct.unpack('<Q', elem_data[0:8])[0]
-        key_ptr = struct.unpack('<Q', elem_data[16:24])[0]
-        prop_name = read_stringname(reader, key_ptr, base, module_size)
-        
-        if prop_name:
-            psg = elem_data[24:]
-            var_type = struct.unpack('<i', psg[0:4])[0]
-            properties.append({'name': prop_name, 'type': var_type})
-        
-        current = next_ptr
-        count += 1
-        if not next_ptr:
-            break
-    
-    return properties
-
-
-def dump_all_classes(reader: MemoryReader, hashmap_addr: int, base: int, module_size: int) -> dict:
-    """
-    提取所有类信息
-    
-    Returns:
-        dict: {class_name: {'name', 'parent', 'methods', 'properties'}, ...}
-    """
-    head_element = reader.read_qword(hashmap_addr + 16)
-    size = reader.read_dword(hashmap_addr + 36)
-    
-    if not head_element:
-        return {}
-    
-    classes = {}
-    current = head_element
-    count = 0
-    
-    while current and count < size + 100:
-        elem_data = reader.read_bytes(current, 32)
-        if not elem_data:
-            break
-        
-        next_ptr = struct.unpack('<Q', elem_data[0:8])[0]
-        class_info_addr = current + 24
-        
-        ci_data = reader.read_bytes(class_info_addr, 0x200)
-        if ci_data:
-            name_ptr = struct.unpack('<Q', ci_data[CLASSINFO_NAME_OFFSET:CLASSINFO_NAME_OFFSET+8])[0]
-            inherits_ptr = struct.unpack('<Q', ci_data[CLASSINFO_INHERITS_OFFSET:CLASSINFO_INHERITS_OFFSET+8])[0]
-            
-            class_name = read_stringname(reader, name_ptr, base, module_size)
-            parent_name = read_stringname(reader, inherits_ptr, base, module_size)
-            
-            if class_name:
-                methods = dump_class_methods(reader, ci_data, base, module_size)
-                properties = dump_class_properties(reader, ci_data, base, module_size)
-                classes[class_name] = {
-                    'name': class_name,
-                    'parent': parent_name,
-                    'methods': methods,
-                    'properties': properties,
-                }
-        
-        current = next_ptr
-        count += 1
-        if not next_ptr:
-            break
-    
-    return classes
-
-
-def calculate_field_offsets(classes: dict) -> None:
-    """计算每个类的字段偏移量（原地修改）"""
-    visited = set()
-    
-    def get_parent_size(class_name: str) -> int:
-        if class_name not in classes or class_name in visited:
-            return 8
-        visited.add(class_name)
-        cls = classes[class_name]
-        parent = cls.get('parent')
-        parent_size = get_parent_size(parent) if parent else 8
-        for prop in cls.get('properties', []):
-            size = get_type_size(prop['type'])
-            if parent_size % 8 != 0:
-                parent_size = (parent_size + 7) & ~7
-            parent_size += size
-        visited.discard(class_name)
-        return parent_size
-    
-    for class_name, cls in classes.items():
-        parent = cls.get('parent')
-        offset = get_parent_size(parent) if parent else 8
-        for prop in cls.get('properties', []):
-            size = get_type_size(prop['type'])
-            if offset % 8 != 0:
-                offset = (offset + 7) & ~7
-            prop['offset'] = offset
-            offset += size
-        cls['size'] = offset
+"""
+ClassDB 解析模块
+"""
+
+import contextvars
+import copy
+import hashlib
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .memory import MemoryReader, is_valid_pointer, read_stringnames
+from .constants import (
+    CLASSINFO_METHOD_MAP_OFFSET,
+    CLASSINFO_PROP_SETGET_OFFSET,
+    CLASSINFO_INHERITS_OFFSET,
+    CLASSINFO_NAME_OFFSET,
+    HASH_TABLE_SIZE_PRIMES,
+)
+from .layout import LayoutEngine
+
+# HashMap 头中用到的字段: elements, hashes, head, tail, capacity_idx, size
+HASHMAP_FIELDS = struct.Struct('<QQQQII')
+
+# elements 数组单次读取的上限 (字节)
+ELEMENTS_ARRAY_MAX = 0x200000
+
+# ClassDB 元素: next, prev, key (24 字节) + 内联的 ClassInfo
+CLASSINFO_SIZE = 0x200
+CLASS_ELEMENT_SIZE = 24 + CLASSINFO_SIZE
+
+# hash_classinfo: 落在此范围内的 qword 视为指针，不参与哈希
+POINTER_MIN = 0x10000
+POINTER_MAX = 0x7FFFFFFFFFFF
+
+
+def walk_hashmap_list(reader: MemoryReader, head: int, max_count: int, elem_size: int) -> list[tuple[int, bytes]]:
+    """沿 next 指针逐个读取元素 (每次读取依赖上一次的结果)"""
+    elements = []
+    current = head
+    while current and len(elements) < max_count:
+        elem_data = reader.read_bytes(current, elem_size)
+        if not elem_data or len(elem_data) < elem_size:
+            break
+        elements.append((current, elem_data))
+        current = struct.unpack('<Q', elem_data[0:8])[0]
+    return elements
+
+
+def read_hashmap_elements(reader: MemoryReader, header: bytes, elem_size: int,
+                          base: int, module_size: int) -> list[tuple[int, bytes]] | None:
+    """
+    通过 elements 数组读取 HashMap 的所有元素
+    
+    一次读取 elements 数组 (容量为 HASH_TABLE_SIZE_PRIMES[capacity_idx])，
+    再用一次 read_many 批量读取所有元素，按 next 指针在本地恢复链表顺序；
+    链表断开时其余元素按数组顺序附在后面
+    
+    Returns:
+        list of tuple: [(元素地址, 元素数据), ...]；数组无效时返回 None
+    """
+    if not header or len(header) < HASHMAP_FIELDS.size:
+        return None
+    elements_ptr, _, head, _, capacity_idx, size = HASHMAP_FIELDS.unpack_from(header, 0)
+    if size == 0:
+        return []
+    if capacity_idx >= len(HASH_TABLE_SIZE_PRIMES) or not is_valid_pointer(elements_ptr, base, module_size, reader.regions):
+        return None
+    capacity = HASH_TABLE_SIZE_PRIMES[capacity_idx]
+    if size > capacity or capacity * 8 > ELEMENTS_ARRAY_MAX:
+        return None
+    
+    array = reader.read_bytes(elements_ptr, capacity * 8)
+    if not array or len(array) < capacity * 8:
+        return None
+    ptrs = [p for p in struct.unpack(f'<{capacity}Q', array) if p]
+    if len(ptrs) != size or len(set(ptrs)) != size or head not in ptrs:
+        return None
+    
+    data = {}
+    for ptr, block in zip(ptrs, reader.read_many([(p, elem_size) for p in ptrs])):
+        if not block or len(block) < elem_size:
+            return None
+        data[ptr] = block
+    
+    elements = []
+    current = head
+    while current in data:
+        elem_data = data.pop(current)
+        elements.append((current, elem_data))
+        current = struct.unpack('<Q', elem_data[0:8])[0]
+    elements.extend((p, data[p]) for p in ptrs if p in data)
+    return elements
+
+
+def hashmap_elements(reader: MemoryReader, header: bytes, elem_size: int, base: int,
+                     module_size: int, slack: int = 10) -> list[tuple[int, bytes]]:
+    """
+    读取 HashMap 的所有元素: 优先使用 elements 数组，无效时退回链表遍历
+    
+    Args:
+        header: HashMap 头 (至少 40 字节)
+        slack: 链表遍历时允许超出 size 的元素数
+    """
+    elements = read_hashmap_elements(reader, header, elem_size, base, module_size)
+    if elements is not None:
+        return elements
+    if not header or len(header) < HASHMAP_FIELDS.size:
+        return []
+    _, _, head, _, _, size = HASHMAP_FIELDS.unpack_from(header, 0)
+    return walk_hashmap_list(reader, head, size + slack, elem_size)
+
+
+def parse_method(reader: MemoryReader, addr: int, base: int, module_size: int) -> dict | None:
+    """解析 MethodBind 结构"""
+    return parse_methods(reader, [addr], base, module_size)[0]
+
+
+def parse_methods(reader: MemoryReader, addrs: list[int], base: int, module_size: int) -> list[dict | None]:
+    """
+    批量解析 MethodBind 结构
+    
+    按结构层级批量读取: MethodBind -> (名称, 参数类型数组)
+    """
+    blocks = reader.read_many([(addr, 80) for addr in addrs])
+    regions = reader.regions
+    
+    headers = []
+    for data in blocks:
+        if not data or len(data) < 80:
+            headers.append(None)
+            continue
+        method_id = struct.unpack('<i', data[8:12])[0]
+        name_ptr = struct.unpack('<Q', data[16:24])[0]
+        default_arg_count = struct.unpack('<i', data[48:52])[0]
+        arg_count = struct.unpack('<i', data[52:56])[0]
+        flags = struct.unpack('<I', data[56:60])[0]
+        arg_types_ptr = struct.unpack('<Q', data[64:72])[0]
+        if not (is_valid_pointer(arg_types_ptr, base, module_size, regions) and 0 <= arg_count < 30):
+            arg_types_ptr = 0
+        headers.append((method_id, name_ptr, default_arg_count, arg_count, flags, arg_types_ptr))
+    
+    live = [h for h in headers if h]
+    names = read_stringnames(reader, [h[1] for h in live], base, module_size)
+    types_blocks = reader.read_many([(h[5], (h[3] + 1) * 4) for h in live])
+    
+    methods = []
+    resolved = iter(zip(names, types_blocks))
+    for h in headers:
+        if not h:
+            methods.append(None)
+            continue
+        name, types_data = next(resolved)
+        if not name:
+            methods.append(None)
+            continue
+        
+        method_id, _, default_arg_count, arg_count, flags, _ = h
+        return_type = 0
+        arg_types = []
+        if types_data and len(types_data) >= (arg_count + 1) * 4:
+            return_type = struct.unpack('<i', types_data[0:4])[0]
+            for i in range(arg_count):
+                t = struct.unpack('<i', types_data[(i+1)*4:(i+2)*4])[0]
+                arg_types.append(t)
+        
+        methods.append({
+            'name': name,
+            'method_id': method_id,
+            'arg_count': arg_count,
+            'default_arg_count': default_arg_count,
+            'is_static': (flags & 0x01) != 0,
+            'is_const': (flags & 0x100) != 0,
+            'has_return': (flags & 0x10000) != 0,
+            'return_type': return_type,
+            'arg_types': arg_types,
+        })
+    
+    return methods
+
+
+def dump_class_methods(reader: MemoryReader, ci_data: bytes, base: int, module_size: int) -> list[dict]:
+    """提取类的所有方法"""
+    header = ci_data[CLASSINFO_METHOD_MAP_OFFSET:CLASSINFO_METHOD_MAP_OFFSET + HASHMAP_FIELDS.size]
+    
+    value_ptrs = []
+    for _, elem_data in hashmap_elements(reader, header, 32, base, module_size):
+        value_ptr = struct.unpack('<Q', elem_data[24:32])[0]
+        if is_valid_pointer(value_ptr, base, module_size, reader.regions):
+            value_ptrs.append(value_ptr)
+    
+    return [mb for mb in parse_methods(reader, value_ptrs, base, module_size) if mb]
+
+
+def dump_class_properties(reader: MemoryReader, ci_data: bytes, base: int, module_size: int) -> list[dict]:
+    """提取类的所有属性"""
+    header = ci_data[CLASSINFO_PROP_SETGET_OFFSET:CLASSINFO_PROP_SETGET_OFFSET + HASHMAP_FIELDS.size]
+    
+    entries = []
+    for _, elem_data in hashmap_elements(reader, header, 80, base, module_size):
+        key_ptr = struct.unpack('<Q', elem_data[16:24])[0]
+        psg = elem_data[24:]
+        var_type = struct.unpack('<i', psg[0:4])[0]
+        entries.append((key_ptr, var_type))
+    
+    names = read_stringnames(reader, [key_ptr for key_ptr, _ in entries], base, module_size)
+    properties = []
+    for prop_name, (_, var_type) in zip(names, entries):
+        if prop_name:
+            properties.append({'name': prop_name, 'type': var_type})
+    
+    return properties
+
+
+def parse_class_members(reader: MemoryReader, ci_data: bytes, base: int, module_size: int) -> tuple[list[dict], list[dict]]:
+    """提取类的方法与属性"""
+    methods = dump_class_methods(reader, ci_data, base, module_size)
+    properties = dump_class_properties(reader, ci_data, base, module_size)
+    return methods, properties
+
+
+def hash_classinfo(ci_data: bytes, class_name: str, parent_name: str | None) -> str:
+    """
+    ClassInfo 哈希 (不含指针，跨进程、跨启动稳定)
+    
+    由类名、父类名、method_map / property_setget 的 size 以及去掉指针的 ci_data 块组成。
+    块中看起来像指针的 qword (HashMap 的 elements / hashes / head / tail、StringName、
+    模块内地址) 每次启动或更新后都不同，置零后再哈希。
+    成员数量不变的签名修改 (如参数类型) 检测不到
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(class_name.encode('utf-8'))
+    h.update(b'\0')
+    h.update((parent_name or '').encode('utf-8'))
+    for offset in (CLASSINFO_METHOD_MAP_OFFSET, CLASSINFO_PROP_SETGET_OFFSET):
+        h.update(ci_data[offset+36:offset+40])
+    count = len(ci_data) // 8
+    qwords = struct.unpack_from(f'<{count}Q', ci_data)
+    h.update(struct.pack(
+        f'<{count}Q', *(0 if POINTER_MIN <= q < POINTER_MAX else q for q in qwords)
+    ))
+    return h.hexdigest()
+
+
+def diff_dumps(previous: dict, classes: dict) -> dict:
+    """
+    比较两次 dump
+    
+    Returns:
+        dict: {'added', 'removed', 'reparsed', 'reused'} 类名列表
+    """
+    added = [name for name in classes if name not in previous]
+    removed = [name for name in previous if name not in classes]
+    reparsed = []
+    reused = []
+    for name, cls in classes.items():
+        prev = previous.get(name)
+        if prev and prev.get('ci_hash') and prev.get('ci_hash') == cls.get('ci_hash'):
+            reused.append(name)
+        else:
+            reparsed.append(name)
+    return {'added': added, 'removed': removed, 'reparsed': reparsed, 'reused': reused}
+
+
+def iter_all_classes(reader: MemoryReader, hashmap_addr: int, base: int, module_size: int,
+                     workers: int = 1, previous: dict | None = None, start: int | None = None):
+    """
+    逐个产出类信息 (生成器)
+    
+    元素 (含内联的 ClassInfo) 通过 elements 数组批量读取，数组无效时退回链表遍历。
+    每个类解析完成即产出，按链表顺序；多线程时最多积压 workers * 4 个类。
+    字段偏移不在此计算
+    
+    Args:
+        workers: 并行解析方法/属性的线程数
+        previous: 上一次 dump 的结果。ci_hash 未变化的类直接复用其方法与属性
+        start: 从该元素开始沿链表遍历 (默认从链表头开始)
+    
+    Yields:
+        dict: {'name', 'parent', 'ci_hash', 'methods', 'properties'}
+    """
+    header = reader.read_bytes(hashmap_addr, HASHMAP_FIELDS.size)
+    if not header or len(header) < HASHMAP_FIELDS.size:
+        return
+    size = HASHMAP_FIELDS.unpack_from(header, 0)[5]
+    if start is not None:
+        elements = walk_hashmap_list(reader, start, size + 100, CLASS_ELEMENT_SIZE)
+    else:
+        elements = hashmap_elements(reader, header, CLASS_ELEMENT_SIZE, base, module_size, slack=100)
+    if not elements:
+        return
+    
+    # 类名与父类名批量解析
+    name_ptrs = []
+    for _, elem_data in elements:
+        ci_data = elem_data[24:]
+        name_ptrs.append(struct.unpack('<Q', ci_data[CLASSINFO_NAME_OFFSET:CLASSINFO_NAME_OFFSET+8])[0])
+        name_ptrs.append(struct.unpack('<Q', ci_data[CLASSINFO_INHERITS_OFFSET:CLASSINFO_INHERITS_OFFSET+8])[0])
+    names = read_stringnames(reader, name_ptrs, base, module_size)
+    
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    max_pending = workers * 4
+    pending = deque()
+    
+    def build(item) -> dict:
+        class_name, parent_name, ci_hash, members = item
+        methods, properties = members if isinstance(members, tuple) else members.result()
+        return {
+            'name': class_name,
+            'parent': parent_name,
+            'ci_hash': ci_hash,
+            'methods': methods,
+            'properties': properties,
+        }
+    
+    try:
+        for i, (_, elem_data) in enumerate(elements):
+            ci_data = elem_data[24:]
+            class_name = names[2 * i]
+            parent_name = names[2 * i + 1]
+            
+            if class_name:
+                ci_hash = hash_classinfo(ci_data, class_name, parent_name)
+                prev = previous.get(class_name) if previous else None
+                if prev and prev.get('ci_hash') == ci_hash:
+                    members = (copy.deepcopy(prev['methods']), copy.deepcopy(prev['properties']))
+                elif pool:
+                    # 复制上下文，工作线程的读取计入调用者的 Profiler 阶段
+                    members = pool.submit(contextvars.copy_context().run,
+                                          parse_class_members, reader, ci_data, base, module_size)
+                else:
+                    members = parse_class_members(reader, ci_data, base, module_size)
+                pending.append((class_name, parent_name, ci_hash, members))
+            
+            # 按顺序产出已完成的类
+            while pending and (
+                isinstance(pending[0][3], tuple) or pending[0][3].done() or len(pending) > max_pending
+            ):
+                yield build(pending.popleft())
+        
+        while pending:
+            yield build(pending.popleft())
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+def dump_all_classes(reader: MemoryReader, hashmap_addr: int, base: int, module_size: int,
+                     workers: int = 1, previous: dict | None = None) -> dict:
+    """
+    提取所有类信息
+    
+    Args:
+        workers: 并行解析方法/属性的线程数。主线程遍历类链表，
+                 每个 ClassInfo 交给线程池解析；结果保持链表顺序
+        previous: 上一次 dump 的结果。ci_hash 未变化的类直接复用其方法与属性
+    
+    Returns:
+        dict: {class_name: {'name', 'parent', 'ci_hash', 'methods', 'properties'}, ...}
+    """
+    classes = {}
+    for cls in iter_all_classes(reader, hashmap_addr, base, module_size, workers, previous):
+        classes[cls['name']] = cls
+    return classes
+
+
+def calculate_field_offsets(classes: dict) -> LayoutEngine:
+    """
+    计算每个类的字段偏移量（原地修改）
+    
+    Returns:
+        LayoutEngine: 已计算完成的布局引擎，可用于 layout_of 查询
+    """
+    engine = LayoutEngine(classes)
+    engine.compute_all()
+    for class_name, cls in classes.items():
+        layout = engine.layout_of(class_name)
+        for prop, field in zip(cls.get('properties', []), layout['fields']):
+            prop['offset'] = field['offset']
+        cls['size'] = layout['size']
+    return engine
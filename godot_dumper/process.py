@@ -1,111 +1,241 @@
-"""
-进程检测模块
-"""
-
-import ctypes
-from ctypes import wintypes
-import struct
-import subprocess
-
-user32 = ctypes.WinDLL('user32', use_last_error=True)
-
-EnumWindows = user32.EnumWindows
-GetWindowThreadProcessId = user32.GetWindowThreadProcessId
-GetClassName = user32.GetClassNameW
-GetWindowText = user32.GetWindowTextW
-
-WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
-
-
-def find_godot_process() -> list[dict]:
-    """
-    通过窗口类名 'Engine' 查找 Godot 进程
-    
-    Returns:
-        list of dict: [{'pid': int, 'hwnd': int, 'title': str}, ...]
-    """
-    results = []
-    
-    def enum_callback(hwnd, lparam):
-        class_name = ctypes.create_unicode_buffer(256)
-        title = ctypes.create_unicode_buffer(256)
-        GetClassName(hwnd, class_name, 256)
-        GetWindowText(hwnd, title, 256)
-        
-        if class_name.value == "Engine":
-            pid = wintypes.DWORD()
-            GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-            results.append({
-                'pid': pid.value,
-                'hwnd': hwnd,
-                'title': title.value,
-            })
-        return True
-    
-    EnumWindows(WNDENUMPROC(enum_callback), 0)
-    return results
-
-
-def get_module_info(pid: int) -> tuple[str | None, int | None, int | None]:
-    """
-    获取主模块信息
-    
-    Returns:
-        tuple: (module_name, base_address, module_size)
-    """
-    try:
-        cmd = (
-            f"Get-Process -Id {pid} | "
-            "Select-Object -ExpandProperty MainModule | "
-            "ForEach-Object { $_.ModuleName + '|' + $_.BaseAddress.ToString() + '|' + $_.ModuleMemorySize.ToString() }"
-        )
-        output = subprocess.check_output(
-            ['powershell', '-Command', cmd],
-            encoding='utf-8', errors='ignore'
-        )
-        parts = output.strip().split('|')
-        if len(parts) == 3:
-            return parts[0], int(parts[1]), int(parts[2])
-    except:
-        pass
-    return None, None, None
-
-
-def get_pe_sections(reader, base: int) -> list[dict]:
-    """
-    解析 PE 头获取段信息
-    
-    Returns:
-        list of dict: [{'name': str, 'va': int, 'size': int}, ...]
-    """
-    dos_header = reader.read_bytes(base, 64)
-    if not dos_header or dos_header[:2] != b'MZ':
-        return []
-    
-    e_lfanew = struct.unpack('<I', dos_header[60:64])[0]
-    pe_header = reader.read_bytes(base + e_lfanew, 264)
-    if not pe_header or pe_header[:4] != b'PE\x00\x00':
-        return []
-    
-    num_sections = struct.unpack('<H', pe_header[6:8])[0]
-    size_opt_header = struct.unpack('<H', pe_header[20:22])[0]
-    
-    sections = []
-    section_offset = e_lfanew + 24 + size_opt_header
-    
-    for i in range(num_sections):
-        sec_data = reader.read_bytes(base + section_offset + i * 40, 40)
-        if not sec_data:
-            continue
-        
-        name = sec_data[:8].rstrip(b'\x00').decode('ascii', errors='ignore')
-        virtual_size = struct.unpack('<I', sec_data[8:12])[0]
-        virtual_addr = struct.unpack('<I', sec_data[12:16])[0]
-        
-        sections.append({
-            'name': name,
-            'va': base + virtual_addr,
-            'size': virtual_size,
-        })
-    
-    return sections
+"""
+进程检测模块
+"""
+
+import ctypes
+import hashlib
+import os
+import struct
+import subprocess
+import sys
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+    EnumWindows = user32.EnumWindows
+    GetWindowThreadProcessId = user32.GetWindowThreadProcessId
+    GetClassName = user32.GetClassNameW
+    GetWindowText = user32.GetWindowTextW
+
+    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+# ELF 程序头
+PT_LOAD = 1
+PF_X = 0x1
+PF_W = 0x2
+
+
+def find_godot_process() -> list[dict]:
+    """
+    通过窗口类名 'Engine' 查找 Godot 进程
+    
+    Returns:
+        list of dict: [{'pid': int, 'hwnd': int, 'title': str}, ...]
+        非 Windows 平台没有窗口类可查，返回空列表 (请直接指定 pid)
+    """
+    results = []
+    if sys.platform != 'win32':
+        return results
+    
+    def enum_callback(hwnd, lparam):
+        class_name = ctypes.create_unicode_buffer(256)
+        title = ctypes.create_unicode_buffer(256)
+        GetClassName(hwnd, class_name, 256)
+        GetWindowText(hwnd, title, 256)
+        
+        if class_name.value == "Engine":
+            pid = wintypes.DWORD()
+            GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            results.append({
+                'pid': pid.value,
+                'hwnd': hwnd,
+                'title': title.value,
+            })
+        return True
+    
+    EnumWindows(WNDENUMPROC(enum_callback), 0)
+    return results
+
+
+def get_module_info(pid: int) -> tuple[str | None, int | None, int | None]:
+    """
+    获取主模块信息
+    
+    Returns:
+        tuple: (module_name, base_address, module_size)
+    """
+    if sys.platform != 'win32':
+        return _get_module_info_proc(pid)
+    try:
+        cmd = (
+            f"Get-Process -Id {pid} | "
+            "Select-Object -ExpandProperty MainModule | "
+            "ForEach-Object { $_.ModuleName + '|' + $_.BaseAddress.ToString() + '|' + $_.ModuleMemorySize.ToString() }"
+        )
+        output = subprocess.check_output(
+            ['powershell', '-Command', cmd],
+            encoding='utf-8', errors='ignore'
+        )
+        parts = output.strip().split('|')
+        if len(parts) == 3:
+            return parts[0], int(parts[1]), int(parts[2])
+    except:
+        pass
+    return None, None, None
+
+
+def _get_module_info_proc(pid: int) -> tuple[str | None, int | None, int | None]:
+    """
+    从 /proc/<pid>/maps 获取主模块信息
+
+    Wine/Proton 目标取映射的 .exe，否则取进程可执行文件
+    """
+    try:
+        exe_path = os.path.realpath(f'/proc/{pid}/exe')
+        with open(f'/proc/{pid}/maps', 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None, None, None
+
+    mappings = {}
+    for line in lines:
+        parts = line.split(None, 5)
+        if len(parts) < 6:
+            continue
+        start, end = (int(x, 16) for x in parts[0].split('-'))
+        path = parts[5].strip()
+        lo, hi = mappings.get(path, (start, end))
+        mappings[path] = (min(lo, start), max(hi, end))
+
+    target = next((p for p in mappings if p.lower().endswith('.exe')), None)
+    if target is None and exe_path in mappings:
+        target = exe_path
+    if target is None:
+        return None, None, None
+
+    lo, hi = mappings[target]
+    return os.path.basename(target), lo, hi - lo
+
+
+def get_pe_sections(reader, base: int) -> list[dict]:
+    """
+    解析 PE 头获取段信息
+    
+    Returns:
+        list of dict: [{'name': str, 'va': int, 'size': int}, ...]
+    """
+    dos_header = reader.read_bytes(base, 64)
+    if not dos_header or dos_header[:2] != b'MZ':
+        return []
+    
+    e_lfanew = struct.unpack('<I', dos_header[60:64])[0]
+    pe_header = reader.read_bytes(base + e_lfanew, 264)
+    if not pe_header or pe_header[:4] != b'PE\x00\x00':
+        return []
+    
+    num_sections = struct.unpack('<H', pe_header[6:8])[0]
+    size_opt_header = struct.unpack('<H', pe_header[20:22])[0]
+    
+    sections = []
+    section_offset = e_lfanew + 24 + size_opt_header
+    
+    for i in range(num_sections):
+        sec_data = reader.read_bytes(base + section_offset + i * 40, 40)
+        if not sec_data:
+            continue
+        
+        name = sec_data[:8].rstrip(b'\x00').decode('ascii', errors='ignore')
+        virtual_size = struct.unpack('<I', sec_data[8:12])[0]
+        virtual_addr = struct.unpack('<I', sec_data[12:16])[0]
+        
+        sections.append({
+            'name': name,
+            'va': base + virtual_addr,
+            'size': virtual_size,
+        })
+    
+    return sections
+
+
+def get_elf_sections(reader, base: int) -> list[dict]:
+    """
+    解析 ELF 程序头获取段信息 (Linux 导出)
+
+    运行时不一定映射节头表，这里用 PT_LOAD 段代替：
+    可写段命名为 .data，可执行段命名为 .text
+    
+    Returns:
+        list of dict: [{'name': str, 'va': int, 'size': int}, ...]
+    """
+    ehdr = reader.read_bytes(base, 64)
+    if not ehdr or ehdr[:4] != b'\x7fELF' or ehdr[4] != 2:
+        return []
+    
+    e_phoff = struct.unpack('<Q', ehdr[32:40])[0]
+    e_phentsize, e_phnum = struct.unpack('<HH', ehdr[54:58])
+    phdrs = reader.read_bytes(base + e_phoff, e_phentsize * e_phnum)
+    if not phdrs:
+        return []
+    
+    loads = []
+    for i in range(e_phnum):
+        p_type, p_flags, _, p_vaddr, _, _, p_memsz = struct.unpack_from('<IIQQQQQ', phdrs, i * e_phentsize)
+        if p_type == PT_LOAD:
+            loads.append((p_vaddr, p_memsz, p_flags))
+    if not loads:
+        return []
+    
+    load_bias = base - (min(l[0] for l in loads) & ~0xFFF)
+    sections = []
+    for vaddr, memsz, flags in loads:
+        if flags & PF_W:
+            name = '.data'
+        elif flags & PF_X:
+            name = '.text'
+        else:
+            name = '.rodata'
+        sections.append({
+            'name': name,
+            'va': load_bias + vaddr,
+            'size': memsz,
+        })
+    
+    return sections
+
+
+def get_module_sections(reader, base: int) -> list[dict]:
+    """按模块格式 (PE / ELF) 获取段信息"""
+    return get_pe_sections(reader, base) or get_elf_sections(reader, base)
+
+
+def get_module_fingerprint(reader, base: int, sections: list[dict] | None = None) -> str | None:
+    """
+    模块指纹: PE TimeDateStamp + SizeOfImage + 段表哈希
+    
+    同一构建的可执行文件指纹相同。ELF 模块没有时间戳，仅使用段表哈希
+    
+    Returns:
+        str: 如 '5f000000-4a3c000-1a2b3c4d5e6f7a8b'，读取失败返回 None
+    """
+    if sections is None:
+        sections = get_module_sections(reader, base)
+    if not sections:
+        return None
+    
+    sec_hash = hashlib.sha1()
+    for sec in sections:
+        sec_hash.update(f"{sec['name']}:{sec['va'] - base:x}:{sec['size']:x};".encode('utf-8'))
+    
+    timestamp = 0
+    size_of_image = 0
+    dos_header = reader.read_bytes(base, 64)
+    if dos_header and dos_header[:2] == b'MZ':
+        e_lfanew = struct.unpack('<I', dos_header[60:64])[0]
+        pe_header = reader.read_bytes(base + e_lfanew, 264)
+        if pe_header and pe_header[:4] == b'PE\x00\x00':
+            timestamp = struct.unpack('<I', pe_header[8:12])[0]
+            size_of_image = struct.unpack('<I', pe_header[24 + 56:24 + 60])[0]
+    
+    return f"{timestamp:08x}-{size_of_image:x}-{sec_hash.hexdigest()[:16]}"
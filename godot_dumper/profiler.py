@@ -0,0 +1,150 @@
+"""
+阶段计时与读取统计
+
+Profiler 记录每个阶段的耗时，ProfilingBackend 把每次后端读取计入当前阶段
+(调用次数、字节数、失败次数、延迟直方图)。未启用时不安装任何包装，没有额外开销
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from .backends import MemoryBackend
+
+# 延迟直方图: 第 i 个桶为 [2^(i-1), 2^i) 微秒，最后一个桶包含更慢的读取
+LATENCY_BUCKETS = 18
+
+# 不在任何阶段内的读取
+OTHER_PHASE = 'other'
+
+
+def _latency_label(i: int) -> str:
+    if i == 0:
+        return "<1us"
+    if i == LATENCY_BUCKETS - 1:
+        return f">={1 << (i - 1)}us"
+    return f"<{1 << i}us"
+
+
+class Profiler:
+    """
+    阶段计时器
+
+    阶段可以嵌套，读取计入最内层的阶段；同名阶段多次进入时累加。
+    阶段栈保存在 ContextVar 中，每个线程独立；线程池任务需用 contextvars.copy_context()
+    提交才会计入提交者的阶段，否则计入 OTHER_PHASE
+    """
+
+    def __init__(self):
+        self.phases: dict[str, dict] = {}
+        self._stack: contextvars.ContextVar[tuple[str, ...]] = contextvars.ContextVar(
+            f'profiler_stack_{id(self)}', default=()
+        )
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> dict:
+        entry = self.phases.get(name)
+        if entry is None:
+            entry = self.phases[name] = {
+                'seconds': 0.0,
+                'count': 0,
+                'read_calls': 0,
+                'read_bytes': 0,
+                'failed_reads': 0,
+                'read_seconds': 0.0,
+                'latency': [0] * LATENCY_BUCKETS,
+            }
+        return entry
+
+    @contextmanager
+    def phase(self, name: str):
+        with self._lock:
+            self._entry(name)
+        token = self._stack.set(self._stack.get() + (name,))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.reset(token)
+            with self._lock:
+                entry = self.phases[name]
+                entry['seconds'] += seconds
+                entry['count'] += 1
+
+    def record_read(self, size: int, data: bytes | None, seconds: float) -> None:
+        bucket = min(int(seconds * 1e6).bit_length(), LATENCY_BUCKETS - 1)
+        stack = self._stack.get()
+        with self._lock:
+            entry = self._entry(stack[-1] if stack else OTHER_PHASE)
+            entry['read_calls'] += 1
+            entry['read_seconds'] += seconds
+            entry['latency'][bucket] += 1
+            if data:
+                entry['read_bytes'] += len(data)
+            if not data or len(data) < size:
+                entry['failed_reads'] += 1
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: {'phases': {阶段名: {'seconds', 'count', 'read_calls', 'read_bytes',
+                                      'failed_reads', 'read_seconds', 'latency_us': {桶: 次数}}},
+                   'total': {'read_calls', 'read_bytes', 'failed_reads', 'read_seconds'}}
+        """
+        with self._lock:
+            phases = {}
+            total = {'read_calls': 0, 'read_bytes': 0, 'failed_reads': 0, 'read_seconds': 0.0}
+            for name, entry in self.phases.items():
+                phase = {k: v for k, v in entry.items() if k != 'latency'}
+                phase['latency_us'] = {
+                    _latency_label(i): n for i, n in enumerate(entry['latency']) if n
+                }
+                phases[name] = phase
+                for key in total:
+                    total[key] += entry[key]
+        return {'phases': phases, 'total': total}
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [f"{'phase':<10} {'seconds':>9} {'reads':>9} {'bytes':>12} {'failed':>7} {'avg us':>8}"]
+        for name, p in report['phases'].items():
+            avg = p['read_seconds'] / p['read_calls'] * 1e6 if p['read_calls'] else 0
+            lines.append(f"{name:<10} {p['seconds']:>9.3f} {p['read_calls']:>9} "
+                         f"{p['read_bytes']:>12} {p['failed_reads']:>7} {avg:>8.1f}")
+        t = report['total']
+        lines.append(f"{'total':<10} {'':>9} {t['read_calls']:>9} {t['read_bytes']:>12} {t['failed_reads']:>7}")
+        return '\n'.join(lines)
+
+    def save_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+class ProfilingBackend(MemoryBackend):
+    """
+    统计读取的后端包装
+
+    扫描进程池中子进程的读取通过 spec() 重新打开内部后端，不计入统计
+    """
+
+    def __init__(self, inner: MemoryBackend, profiler: Profiler):
+        self.inner = inner
+        self.pid = getattr(inner, 'pid', None)
+        self.profiler = profiler
+
+    def read(self, address: int, size: int) -> bytes | None:
+        start = time.perf_counter()
+        data = self.inner.read(address, size)
+        self.profiler.record_read(size, data, time.perf_counter() - start)
+        return data
+
+    def spec(self) -> tuple | None:
+        return self.inner.spec()
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        return self.inner.regions()
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,52 @@
+"""
+内存区域表
+
+附加时从后端获取已提交且可读的区域 (VirtualQueryEx、/proc/<pid>/maps 或镜像区域表)，
+合并为有序数组，指针校验为一次二分查找
+"""
+
+import bisect
+
+
+class RegionMap:
+    """
+    有序、合并后的可读区域 [start, end)
+
+    Args:
+        regions: [(起始地址, 大小), ...]，可无序、可重叠
+    """
+
+    def __init__(self, regions: list[tuple[int, int]]):
+        starts: list[int] = []
+        ends: list[int] = []
+        for start, size in sorted(regions):
+            if size <= 0:
+                continue
+            end = start + size
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def contains(self, address: int, size: int = 1) -> bool:
+        """[address, address + size) 是否整体可读"""
+        i = bisect.bisect_right(self.starts, address) - 1
+        return i >= 0 and address + size <= self.ends[i]
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """[(起始地址, 大小), ...]"""
+        return [(start, end - start) for start, end in zip(self.starts, self.ends)]
+
+    @classmethod
+    def from_backend(cls, backend) -> 'RegionMap | None':
+        """后端不提供区域信息时返回 None (退回地址范围检查)"""
+        regions = backend.regions() if backend is not None else None
+        if not regions:
+            return None
+        return cls(regions)
@@ -1,162 +1,490 @@
-"""
-ClassDB HashMap 扫描模块
-"""
-
-import struct
-from .memory import MemoryReader, is_valid_pointer, read_stringname
-
-# Godot 核心类列表，用于打分
-GODOT_CORE_CLASSES = {
-    'Object', 'RefCounted', 'Resource', 'Node', 'Node2D', 'Node3D',
-    'Control', 'Sprite2D', 'Camera2D', 'Camera3D', 'AudioStreamPlayer'
-}
-
-
-def score_hashmap(reader: MemoryReader, addr: int, base: int, module_size: int) -> tuple[int, dict]:
-    """
-    对 HashMap 结构打分 - ClassDB 特征检测
-    
-    Returns:
-        tuple: (score, details_dict)
-    """
-    data = reader.read_bytes(addr, 48)
-    if not data or len(data) < 48:
-        return 0, {}
-    
-    elements_ptr = struct.unpack('<Q', data[0:8])[0]
-    hashes_ptr = struct.unpack('<Q', data[8:16])[0]
-    head_ptr = struct.unpack('<Q', data[16:24])[0]
-    tail_ptr = struct.unpack('<Q', data[24:32])[0]
-    capacity_idx = struct.unpack('<I', data[32:36])[0]
-    size = struct.unpack('<I', data[36:40])[0]
-    
-    score = 0
-    details = {'size': size, 'head_ptr': hex(head_ptr)}
-    
-    # 基本结构验证
-    if size < 10 or size > 10000:
-        return 0, details
-    if not (0 < capacity_idx < 30):
-        return 0, details
-    if not is_valid_pointer(head_ptr, base, module_size):
-        return 0, details
-    if not is_valid_pointer(tail_ptr, base, module_size):
-        return 0, details
-    
-    # ClassDB 特征: 类数量通常 500-2000
-    if 500 <= size <= 2000:
-        score += 100
-    elif 200 <= size <= 3000:
-        score += 50
-    else:
-        score += 10
-    
-    # 遍历链表深度验证
-    valid_elements = 0
-    has_methods = 0
-    class_names = []
-    current = head_ptr
-    
-    for i in range(min(20, size)):
-        if not current:
-            break
-        elem_data = reader.read_bytes(current, 32)
-        if not elem_data:
-            break
-        
-        next_ptr = struct.unpack('<Q', elem_data[0:8])[0]
-        prev_ptr = struct.unpack('<Q', elem_data[8:16])[0]
-        key_ptr = struct.unpack('<Q', elem_data[16:24])[0]
-        
-        # 链表完整性检查
-        if i == 0 and prev_ptr != 0:
-            score -= 20
-        
-        name = read_stringname(reader, key_ptr, base, module_size)
-        if name and len(name) > 0:
-            # 类名格式检查
-            if name[0].isupper() and name.replace('_', '').replace('2D', '').replace('3D', '').isalnum():
-                valid_elements += 1
-                class_names.append(name)
-                
-                # Godot 核心类加分
-                if name in GODOT_CORE_CLASSES:
-                    score += 50
-                
-                # 检查 ClassInfo 结构
-                class_info_addr = current + 24
-                ci_data = reader.read_bytes(class_info_addr, 0x190)
-                if ci_data:
-                    # 验证 method_map (+0x28)
-                    mm_head = struct.unpack('<Q', ci_data[0x28+16:0x28+24])[0]
-                    mm_size = struct.unpack('<I', ci_data[0x28+36:0x28+40])[0]
-                    if is_valid_pointer(mm_head, base, module_size) and 0 < mm_size < 1000:
-                        has_methods += 1
-                        score += 5
-                    
-                    # 验证 name (+0x180) 与 key 一致
-                    name_ptr = struct.unpack('<Q', ci_data[0x180:0x188])[0]
-                    ci_name = read_stringname(reader, name_ptr, base, module_size)
-                    if ci_name == name:
-                        score += 10
-        
-        current = next_ptr
-        if not current:
-            break
-    
-    # 有效元素比例
-    if valid_elements >= 15:
-        score += 100
-    elif valid_elements >= 10:
-        score += 50
-    else:
-        score += valid_elements * 3
-    
-    # 有方法的类比例
-    if has_methods >= 10:
-        score += 80
-    elif has_methods >= 5:
-        score += 40
-    
-    details['valid_elements'] = valid_elements
-    details['has_methods'] = has_methods
-    details['sample_names'] = class_names[:5]
-    
-    return score, details
-
-
-def scan_for_classdb(reader: MemoryReader, base: int, module_size: int, sections: list[dict]) -> list[dict]:
-    """
-    扫描数据段寻找 ClassDB::classes
-    
-    Returns:
-        list of dict: 候选列表，按分数降序排列
-    """
-    candidates = []
-    
-    # 筛选数据段
-    data_sections = [
-        s for s in sections 
-        if 'data' in s['name'].lower() or 'bss' in s['name'].lower()
-    ]
-    if not data_sections:
-        data_sections = [{'va': base, 'size': module_size, 'name': 'full'}]
-    
-    for sec in data_sections:
-        start = sec['va']
-        end = start + sec['size']
-        addr = start
-        
-        while addr < end - 48:
-            score, details = score_hashmap(reader, addr, base, module_size)
-            if score > 100:
-                candidates.append({
-                    'address': addr,
-                    'offset': addr - base,
-                    'score': score,
-                    'details': details,
-                })
-            addr += 8
-    
-    candidates.sort(key=lambda x: x['score'], reverse=True)
-    return candidates
+"""
+ClassDB HashMap 扫描模块
+"""
+
+import re
+import struct
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from .backends import open_backend
+from .memory import MemoryReader, is_valid_pointer, read_stringname
+from .xrefs import rank_xref_candidates
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Godot 核心类列表，用于打分
+GODOT_CORE_CLASSES = {
+    'Object', 'RefCounted', 'Resource', 'Node', 'Node2D', 'Node3D',
+    'Control', 'Sprite2D', 'Camera2D', 'Camera3D', 'AudioStreamPlayer'
+}
+
+# HashMap 头大小
+HASHMAP_HEADER_SIZE = 48
+
+# 分层打分: 头部检查 -> 前几个元素探测 -> 深度探测
+PROBE_ELEMENTS = 2
+DEEP_ELEMENTS = 20
+# 探测层截断: 探测元素带来的加分低于此值时拒绝该 HashMap (分数为 0)
+PROBE_MIN_GAIN = 10
+
+# stop_when_confident 的默认置信分数
+CONFIDENCE_THRESHOLD = 500
+
+# 并行扫描: 每个进程分到的块数 (负载均衡) 与最小块大小
+SCAN_CHUNKS_PER_PROCESS = 4
+SCAN_MIN_CHUNK = 0x10000
+
+# 段读取失败时的分块大小
+SECTION_CHUNK_SIZE = 0x100000
+
+# 头部预筛选: +0x20 capacity_idx (1..29), +0x24 size (高两字节为 0)
+_HEADER_PATTERN = re.compile(rb'(?=[\x01-\x1d]\x00\x00\x00[\x00-\xff][\x00-\x27]\x00\x00)', re.DOTALL)
+
+
+def score_hashmap(reader: MemoryReader, addr: int, base: int, module_size: int,
+                  header: bytes | None = None) -> tuple[int, dict]:
+    """
+    对 HashMap 结构打分 - ClassDB 特征检测
+    
+    分层进行，每层未达到截断分数即提前返回:
+        1. 头部检查 (size / capacity_idx / head / tail)
+        2. 探测前 PROBE_ELEMENTS 个元素
+        3. 深度探测至 DEEP_ELEMENTS 个元素
+    
+    Args:
+        header: 已读取的 48 字节 HashMap 头 (可选，避免重复读取)
+    
+    Returns:
+        tuple: (score, details_dict)，details['tier'] 为到达的层级
+    """
+    data = header if header is not None else reader.read_bytes(addr, HASHMAP_HEADER_SIZE)
+    if not data or len(data) < HASHMAP_HEADER_SIZE:
+        return 0, {}
+    
+    elements_ptr = struct.unpack('<Q', data[0:8])[0]
+    hashes_ptr = struct.unpack('<Q', data[8:16])[0]
+    head_ptr = struct.unpack('<Q', data[16:24])[0]
+    tail_ptr = struct.unpack('<Q', data[24:32])[0]
+    capacity_idx = struct.unpack('<I', data[32:36])[0]
+    size = struct.unpack('<I', data[36:40])[0]
+    
+    score = 0
+    details = {'size': size, 'head_ptr': hex(head_ptr), 'tier': 1}
+    regions = reader.regions
+    
+    # 第 1 层: 基本结构验证
+    if size < 10 or size > 10000:
+        return 0, details
+    if not (0 < capacity_idx < 30):
+        return 0, details
+    if not is_valid_pointer(head_ptr, base, module_size, regions):
+        return 0, details
+    if not is_valid_pointer(tail_ptr, base, module_size, regions):
+        return 0, details
+    
+    # ClassDB 特征: 类数量通常 500-2000
+    if 500 <= size <= 2000:
+        score += 100
+    elif 200 <= size <= 3000:
+        score += 50
+    else:
+        score += 10
+    
+    # 第 2/3 层: 遍历链表验证
+    valid_elements = 0
+    has_methods = 0
+    class_names = []
+    current = head_ptr
+    header_score = score
+    
+    for i in range(min(DEEP_ELEMENTS, size)):
+        if i == PROBE_ELEMENTS:
+            # 探测层截断: 前几个元素不像类时拒绝 (分数为 0，不会成为候选)
+            if score - header_score < PROBE_MIN_GAIN:
+                break
+            details['tier'] = 3
+        elif i == 0:
+            details['tier'] = 2
+        
+        if not current:
+            break
+        elem_data = reader.read_bytes(current, 32)
+        if not elem_data:
+            break
+        
+        next_ptr = struct.unpack('<Q', elem_data[0:8])[0]
+        prev_ptr = struct.unpack('<Q', elem_data[8:16])[0]
+        key_ptr = struct.unpack('<Q', elem_data[16:24])[0]
+        
+        # 链表完整性检查
+        if i == 0 and prev_ptr != 0:
+            score -= 20
+        
+        name = read_stringname(reader, key_ptr, base, module_size)
+        if name and len(name) > 0:
+            # 类名格式检查
+            if name[0].isupper() and name.replace('_', '').replace('2D', '').replace('3D', '').isalnum():
+                valid_elements += 1
+                class_names.append(name)
+                
+                # Godot 核心类加分
+                if name in GODOT_CORE_CLASSES:
+                    score += 50
+                
+                # 检查 ClassInfo 结构
+                class_info_addr = current + 24
+                ci_data = reader.read_bytes(class_info_addr, 0x190)
+                if ci_data:
+                    # 验证 method_map (+0x28)
+                    mm_head = struct.unpack('<Q', ci_data[0x28+16:0x28+24])[0]
+                    mm_size = struct.unpack('<I', ci_data[0x28+36:0x28+40])[0]
+                    if is_valid_pointer(mm_head, base, module_size, regions) and 0 < mm_size < 1000:
+                        has_methods += 1
+                        score += 5
+                    
+                    # 验证 name (+0x180) 与 key 一致
+                    name_ptr = struct.unpack('<Q', ci_data[0x180:0x188])[0]
+                    ci_name = read_stringname(reader, name_ptr, base, module_size)
+                    if ci_name == name:
+                        score += 10
+        
+        current = next_ptr
+        if not current:
+            break
+    
+    # 未通过探测层 (包括链表在探测层内结束) 的 HashMap 不作为候选
+    if details['tier'] < 3 and score - header_score < PROBE_MIN_GAIN:
+        details['rejected'] = 'probe'
+        return 0, details
+    
+    # 有效元素比例
+    if valid_elements >= 15:
+        score += 100
+    elif valid_elements >= 10:
+        score += 50
+    else:
+        score += valid_elements * 3
+    
+    # 有方法的类比例
+    if has_methods >= 10:
+        score += 80
+    elif has_methods >= 5:
+        score += 40
+    
+    details['valid_elements'] = valid_elements
+    details['has_methods'] = has_methods
+    details['sample_names'] = class_names[:5]
+    
+    return score, details
+
+
+def is_confident(candidate: dict, threshold: int = CONFIDENCE_THRESHOLD) -> bool:
+    """候选是否可信: 分数达到阈值且样本类名包含 Object"""
+    return candidate['score'] >= threshold and 'Object' in candidate['details'].get('sample_names', [])
+
+
+def read_section(reader: MemoryReader, start: int, size: int) -> list[tuple[int, bytes]]:
+    """
+    一次性读取整个段到本地缓冲区 (内存镜像为零拷贝 memoryview)
+
+    整段读取失败时按块读取，跳过不可读的块 (相邻块重叠一个 HashMap 头)
+
+    Returns:
+        list of tuple: [(块起始地址, 数据), ...]
+    """
+    data = reader.read_view(start, size)
+    if data and len(data) == size:
+        return [(start, data)]
+
+    chunks = []
+    step = SECTION_CHUNK_SIZE
+    for offset in range(0, size, step):
+        chunk_size = min(step + HASHMAP_HEADER_SIZE, size - offset)
+        chunk = reader.read_view(start + offset, chunk_size)
+        if chunk:
+            chunks.append((start + offset, chunk))
+    return chunks
+
+
+def _plausible_pointer(ptr: int) -> bool:
+    return 0x10000 < ptr < 0x7FFFFFFFFFFF
+
+
+def _prefilter_numpy(data: bytes) -> list[int]:
+    count = len(data) // 8 - HASHMAP_HEADER_SIZE // 8 + 1
+    if count <= 0:
+        return []
+    q = np.frombuffer(data, dtype='<u8', count=len(data) // 8)
+    head = q[2:2 + count]
+    tail = q[3:3 + count]
+    meta = q[4:4 + count]
+    capacity_idx = meta & 0xFFFFFFFF
+    size = meta >> np.uint64(32)
+    mask = (
+        (size >= 10) & (size <= 10000)
+        & (capacity_idx >= 1) & (capacity_idx <= 29)
+        & (head > 0x10000) & (head < 0x7FFFFFFFFFFF)
+        & (tail > 0x10000) & (tail < 0x7FFFFFFFFFFF)
+    )
+    return [int(i) * 8 for i in np.flatnonzero(mask)]
+
+
+def _prefilter_regex(data: bytes) -> list[int]:
+    offsets = []
+    for m in _HEADER_PATTERN.finditer(data):
+        pos = m.start()
+        if pos % 8 or pos < 32 or pos + 16 > len(data):
+            continue
+        offset = pos - 32
+        head_ptr, tail_ptr, capacity_idx, size = struct.unpack_from('<QQII', data, offset + 16)
+        if not (10 <= size <= 10000):
+            continue
+        if _plausible_pointer(head_ptr) and _plausible_pointer(tail_ptr):
+            offsets.append(offset)
+    return offsets
+
+
+def prefilter_hashmaps(data: bytes) -> list[int]:
+    """
+    向量化预筛选 HashMap 头
+
+    将缓冲区视为 uint64/uint32 通道，检查 size (10..10000)、capacity_idx (1..29)
+    以及 head/tail 指针范围。有 NumPy 时使用 NumPy，否则使用正则扫描。
+
+    Returns:
+        list of int: 通过筛选的 8 字节对齐偏移
+    """
+    if np is not None:
+        return _prefilter_numpy(data)
+    return _prefilter_regex(data)
+
+
+def make_candidate(reader: MemoryReader, addr: int, base: int, module_size: int,
+                   header: bytes | None = None, xrefs: int = 0) -> dict | None:
+    """打分，分数超过 100 时返回候选"""
+    score, details = score_hashmap(reader, addr, base, module_size, header)
+    if score <= 100:
+        return None
+    details['xrefs'] = xrefs
+    return {
+        'address': addr,
+        'offset': addr - base,
+        'score': score,
+        'details': details,
+    }
+
+
+def score_chunk(reader: MemoryReader, data, chunk_addr: int, start: int, end: int,
+                base: int, module_size: int, skip=frozenset(),
+                stop_when_confident: bool = False,
+                confidence_threshold: int = CONFIDENCE_THRESHOLD) -> list[dict]:
+    """
+    对缓冲区 [start, end) 内起始的 HashMap 头预筛选并打分
+    
+    data 可以是 bytes 或 memoryview；读取窗口额外包含一个 HashMap 头，
+    因此相邻块只需在边界处重叠 HASHMAP_HEADER_SIZE 字节。
+    候选的 details['xrefs'] 为 0，由调用方合并后填入
+    """
+    candidates = []
+    window = data[start:min(end + HASHMAP_HEADER_SIZE, len(data))]
+    try:
+        for offset in prefilter_hashmaps(window):
+            if start + offset >= end:
+                break
+            addr = chunk_addr + start + offset
+            if addr in skip:
+                continue
+            header = bytes(window[offset:offset + HASHMAP_HEADER_SIZE])
+            candidate = make_candidate(reader, addr, base, module_size, header)
+            if candidate:
+                candidates.append(candidate)
+                if stop_when_confident and is_confident(candidate, confidence_threshold):
+                    break
+    finally:
+        if isinstance(window, memoryview):
+            window.release()
+    return candidates
+
+
+_worker_reader: MemoryReader | None = None
+_worker_skip: frozenset = frozenset()
+
+
+def _init_scan_worker(spec: tuple, skip: frozenset) -> None:
+    # skip 每个子进程只传递一次，不随每个块任务序列化
+    global _worker_reader, _worker_skip
+    _worker_reader = MemoryReader(backend=open_backend(spec))
+    _worker_skip = skip
+
+
+def _scan_chunk_worker(shm_name: str, length: int, chunk_addr: int, start: int, end: int,
+                       base: int, module_size: int,
+                       stop_when_confident: bool, confidence_threshold: int) -> list[dict]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    view = shm.buf[:length]
+    try:
+        return score_chunk(
+            _worker_reader, view, chunk_addr, start, end, base, module_size,
+            _worker_skip, stop_when_confident, confidence_threshold
+        )
+    finally:
+        view.release()
+        shm.close()
+
+
+def _scan_sections_parallel(reader: MemoryReader, spec: tuple, data_sections: list[dict],
+                            base: int, module_size: int, processes: int, skip: frozenset,
+                            stop_when_confident: bool,
+                            confidence_threshold: int,
+                            progress: Callable[[dict], None] | None = None) -> list[dict]:
+    """
+    多进程扫描数据段
+    
+    段数据放入共享内存，按块 (块间重叠一个 HashMap 头) 交给进程池打分；
+    子进程通过 spec 重新打开同一目标以跟随指针。结果按块顺序合并
+    """
+    candidates = []
+    segments = []
+    futures = []
+    total = sum(sec['size'] for sec in data_sections)
+    scanned = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_scan_worker,
+                             initargs=(spec, skip)) as pool:
+        try:
+            for sec in data_sections:
+                for chunk_addr, data in read_section(reader, sec['va'], sec['size']):
+                    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+                    shm.buf[:len(data)] = data
+                    segments.append(shm)
+                    
+                    step = -(-len(data) // (processes * SCAN_CHUNKS_PER_PROCESS))
+                    step = max((step + 7) & ~7, SCAN_MIN_CHUNK)
+                    for start in range(0, len(data), step):
+                        end = min(start + step, len(data))
+                        futures.append((sec['name'], end - start, pool.submit(
+                            _scan_chunk_worker, shm.name, len(data), chunk_addr,
+                            start, end, base, module_size,
+                            stop_when_confident, confidence_threshold
+                        )))
+            
+            for name, length, future in futures:
+                found = future.result()
+                candidates.extend(found)
+                scanned += length
+                if progress:
+                    progress({'phase': 'scan', 'section': name, 'scanned': scanned, 'total': total})
+                if stop_when_confident and any(is_confident(c, confidence_threshold) for c in found):
+                    break
+        finally:
+            for _, _, future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+    
+    return candidates
+
+
+def scan_for_classdb(reader: MemoryReader, base: int, module_size: int, sections: list[dict],
+                     use_xrefs: bool = True, max_xref_candidates: int = 512,
+                     stop_when_confident: bool = False,
+                     confidence_threshold: int = CONFIDENCE_THRESHOLD,
+                     processes: int = 1,
+                     progress: Callable[[dict], None] | None = None) -> list[dict]:
+    """
+    扫描数据段寻找 ClassDB::classes
+    
+    先按 .text 中 RIP 相对引用次数对候选排序并优先打分；除非
+    stop_when_confident 且已找到可信候选，否则继续扫描数据段 (跳过已打分的地址)：
+    每个段只读取一次，预筛选后仅对少量候选做完整打分
+    
+    Args:
+        use_xrefs: 是否启用代码交叉引用定位
+        max_xref_candidates: 引用定位最多打分的地址数
+        stop_when_confident: 找到可信候选 (包含 Object 且分数达到阈值) 后立即结束；
+                             为 False 时收集所有候选，便于调试
+        confidence_threshold: 可信候选的分数阈值
+        processes: 段扫描的进程数。大于 1 且后端可在子进程重新打开时，
+                   段数据经共享内存分块交给进程池打分
+        progress: 进度回调，段扫描时按块调用
+                  {'phase': 'scan', 'section', 'scanned', 'total'} (字节数)。
+                  回调抛出的异常会中止扫描
+    
+    Returns:
+        list of dict: 候选列表，按分数降序排列 (同分时引用多者优先)
+    """
+    candidates = []
+    seen = set()
+    
+    # 筛选数据段
+    data_sections = [
+        s for s in sections 
+        if 'data' in s['name'].lower() or 'bss' in s['name'].lower()
+    ]
+    if not data_sections:
+        data_sections = [{'va': base, 'size': module_size, 'name': 'full'}]
+    
+    xref_counts = {}
+    confident = False
+    if use_xrefs:
+        ranked = rank_xref_candidates(reader, sections, data_sections)
+        xref_counts = dict(ranked)
+        for addr, count in ranked[:max_xref_candidates]:
+            seen.add(addr)
+            candidate = make_candidate(reader, addr, base, module_size, None, count)
+            if candidate:
+                candidates.append(candidate)
+                if stop_when_confident and is_confident(candidate, confidence_threshold):
+                    confident = True
+                    break
+    
+    if not confident:
+        backend = getattr(reader, 'backend', None)
+        spec = backend.spec() if backend is not None and processes > 1 else None
+        if spec:
+            found = _scan_sections_parallel(
+                reader, spec, data_sections, base, module_size, processes,
+                frozenset(seen), stop_when_confident, confidence_threshold,
+                progress
+            )
+        else:
+            found = []
+            total = sum(sec['size'] for sec in data_sections)
+            scanned = 0
+            done = False
+            for sec in data_sections:
+                for chunk_addr, data in read_section(reader, sec['va'], sec['size']):
+                    # 有进度回调时分块打分，以便及时报告进度与响应中止
+                    step = SCAN_MIN_CHUNK if progress else len(data)
+                    for start in range(0, len(data), step):
+                        end = min(start + step, len(data))
+                        found.extend(score_chunk(
+                            reader, data, chunk_addr, start, end, base, module_size,
+                            seen, stop_when_confident, confidence_threshold
+                        ))
+                        if progress:
+                            scanned = min(scanned + end - start, total)
+                            progress({'phase': 'scan', 'section': sec['name'],
+                                      'scanned': scanned, 'total': total})
+                        if stop_when_confident and found and is_confident(found[-1], confidence_threshold):
+                            done = True
+                            break
+                    if done:
+                        break
+                if done:
+                    break
+        
+        # read_section 的分块之间有重叠，按地址去重；引用次数在合并后填入
+        for candidate in found:
+            if candidate['address'] not in seen:
+                seen.add(candidate['address'])
+                candidate['details']['xrefs'] = xref_counts.get(candidate['address'], 0)
+                candidates.append(candidate)
+    
+    candidates.sort(key=lambda x: (x['score'], x['details']['xrefs']), reverse=True)
+    return candidates
@@ -0,0 +1,155 @@
+"""
+录制/回放快照模块
+
+录制: 包装任意后端，记录 scanner / parser 读取过的所有页
+回放: 从快照文件提供读取，无需附加进程
+"""
+
+import bisect
+import json
+import struct
+import threading
+import zlib
+from .backends import MemoryBackend
+
+SNAPSHOT_PAGE_SIZE = 0x1000
+
+# 快照文件格式
+# Header: magic(8) version(u32) meta_len(u32) page_count(u32)
+# Meta:   JSON (模块名、基址、大小、PE 段、ClassDB 偏移)
+# Index:  page_count * [page_addr(u64) file_offset(u64) comp_len(u32)]，按地址排序
+# Data:   zlib 压缩的页数据
+SNAPSHOT_MAGIC = b'GDSNAP\x00\x00'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<8sIII')
+SNAPSHOT_ENTRY = struct.Struct('<QQI')
+
+
+class RecordingBackend(MemoryBackend):
+    """
+    录制后端
+
+    转发读取到内部后端，并按页记录读取过的内存
+    """
+
+    def __init__(self, inner: MemoryBackend):
+        self.inner = inner
+        self.pid = getattr(inner, 'pid', None)
+        self.pages: dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+    def read(self, address: int, size: int) -> bytes | None:
+        data = self.inner.read(address, size)
+        if data:
+            self._record(address, data)
+        return data
+
+    def _record(self, address: int, data: bytes) -> None:
+        first = address // SNAPSHOT_PAGE_SIZE
+        last = (address + len(data) - 1) // SNAPSHOT_PAGE_SIZE
+        for index in range(first, last + 1):
+            if index in self.pages:
+                continue
+            page_addr = index * SNAPSHOT_PAGE_SIZE
+            if address <= page_addr and page_addr + SNAPSHOT_PAGE_SIZE <= address + len(data):
+                # 整页已在本次读取中，直接切片 (与解析使用的数据一致)
+                page = bytes(data[page_addr - address:page_addr - address + SNAPSHOT_PAGE_SIZE])
+            else:
+                page = self.inner.read(page_addr, SNAPSHOT_PAGE_SIZE)
+            if not page or len(page) != SNAPSHOT_PAGE_SIZE:
+                # 整页不可读时只保存已读到的部分
+                page = bytearray(SNAPSHOT_PAGE_SIZE)
+                lo = max(address, page_addr)
+                hi = min(address + len(data), page_addr + SNAPSHOT_PAGE_SIZE)
+                page[lo - page_addr:hi - page_addr] = data[lo - address:hi - address]
+                page = bytes(page)
+            with self._lock:
+                self.pages.setdefault(index, page)
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        return self.inner.regions()
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class SnapshotBackend(MemoryBackend):
+    """快照回放后端"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, version, meta_len, page_count = SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise Exception(f"无效的快照文件: {path}")
+
+        offset = SNAPSHOT_HEADER.size
+        self.meta = json.loads(data[offset:offset + meta_len].decode('utf-8'))
+        offset += meta_len
+
+        self._index = []
+        for i in range(page_count):
+            self._index.append(SNAPSHOT_ENTRY.unpack_from(data, offset + i * SNAPSHOT_ENTRY.size))
+        self._addrs = [e[0] for e in self._index]
+        self._data = data
+        self._pages: dict[int, bytes] = {}
+        self.pid = self.meta.get('pid')
+
+    def spec(self) -> tuple | None:
+        return (SnapshotBackend, (self.path,))
+
+    def regions(self) -> list[tuple[int, int]] | None:
+        # 录制时目标进程的可读区域 (旧快照没有此项)
+        regions = self.meta.get('regions')
+        return [tuple(r) for r in regions] if regions else None
+
+    def _page(self, page_addr: int) -> bytes | None:
+        page = self._pages.get(page_addr)
+        if page is not None:
+            return page
+        i = bisect.bisect_left(self._addrs, page_addr)
+        if i == len(self._addrs) or self._addrs[i] != page_addr:
+            return None
+        _, file_offset, comp_len = self._index[i]
+        page = zlib.decompress(self._data[file_offset:file_offset + comp_len])
+        self._pages[page_addr] = page
+        return page
+
+    def read(self, address: int, size: int) -> bytes | None:
+        if size <= 0:
+            return None
+        first = address // SNAPSHOT_PAGE_SIZE
+        last = (address + size - 1) // SNAPSHOT_PAGE_SIZE
+        chunks = []
+        for index in range(first, last + 1):
+            page = self._page(index * SNAPSHOT_PAGE_SIZE)
+            if page is None:
+                return None
+            chunks.append(page)
+        offset = address - first * SNAPSHOT_PAGE_SIZE
+        return b''.join(chunks)[offset:offset + size]
+
+
+def save_snapshot(path: str, pages: dict[int, bytes], meta: dict) -> None:
+    """
+    写入快照文件
+
+    Args:
+        pages: {页索引: 页数据}
+        meta: 模块信息 (module_name, base, module_size, sections, ...)
+    """
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    indices = sorted(pages)
+    payloads = [zlib.compress(pages[i], 6) for i in indices]
+
+    file_offset = SNAPSHOT_HEADER.size + len(meta_bytes) + len(indices) * SNAPSHOT_ENTRY.size
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta_bytes), len(indices)))
+        f.write(meta_bytes)
+        for index, payload in zip(indices, payloads):
+            f.write(SNAPSHOT_ENTRY.pack(index * SNAPSHOT_PAGE_SIZE, file_offset, len(payload)))
+            file_offset += len(payload)
+        for payload in payloads:
+            f.write(payload)
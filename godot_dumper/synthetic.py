@@ -0,0 +1,256 @@
+"""
+合成 Godot 内存镜像
+
+生成带 PE 头与段、ClassDB::classes HashMap、StringName (cname 与 UTF-32 两种形式)
+以及诱饵 HashMap 的内存镜像文件，供 MemoryImageBackend 读取。
+用于在没有游戏进程的情况下测量与回归扫描、解析、生成的性能
+"""
+
+import random
+import struct
+from .backends import write_memory_image
+from .constants import (
+    CLASSINFO_METHOD_MAP_OFFSET,
+    CLASSINFO_PROP_SETGET_OFFSET,
+    CLASSINFO_INHERITS_OFFSET,
+    CLASSINFO_NAME_OFFSET,
+    HASH_TABLE_SIZE_PRIMES,
+)
+
+IMAGE_BASE = 0x140000000
+HEAP_BASE = 0x20000000
+PAGE = 0x1000
+
+CLASSINFO_SIZE = 0x200
+ELEMENT_HEADER = 24
+
+# 核心类的继承关系
+CORE_PARENTS = {
+    'Object': None,
+    'RefCounted': 'Object',
+    'Resource': 'RefCounted',
+    'Node': 'Object',
+    'Node2D': 'Node',
+    'Node3D': 'Node',
+    'Control': 'Node',
+    'Sprite2D': 'Node2D',
+    'Camera2D': 'Node2D',
+    'Camera3D': 'Node3D',
+    'AudioStreamPlayer': 'Node',
+}
+
+# 用于属性的 Variant 类型
+PROPERTY_TYPES = [1, 2, 3, 4, 5, 9, 20, 21, 24]
+
+
+class _Arena:
+    """线性分配的内存区域"""
+
+    def __init__(self, base: int):
+        self.base = base
+        self.buf = bytearray()
+
+    def alloc(self, size: int, align: int = 16) -> int:
+        pad = -len(self.buf) % align
+        self.buf += bytes(pad + size)
+        return self.base + len(self.buf) - size
+
+    def put(self, addr: int, data: bytes) -> None:
+        offset = addr - self.base
+        self.buf[offset:offset + len(data)] = data
+
+    def end(self) -> int:
+        return self.base + len(self.buf)
+
+
+def _capacity_index(count: int) -> int:
+    for i, prime in enumerate(HASH_TABLE_SIZE_PRIMES):
+        if i > 0 and prime >= count * 2:
+            return i
+    return len(HASH_TABLE_SIZE_PRIMES) - 1
+
+
+def build_synthetic_image(path: str, classes: int = 100, methods: int = 10, properties: int = 4,
+                          decoys: int = 8, utf32_ratio: float = 0.25, xrefs: int = 16,
+                          seed: int = 0) -> dict:
+    """
+    生成合成内存镜像
+
+    Args:
+        classes: 类数量 (包含核心类，最多 10000)
+        methods: 每个类的方法数
+        properties: 每个类的属性数
+        decoys: 诱饵 HashMap 数量 (结构有效但不是 ClassDB)
+        utf32_ratio: 名称只有 UTF-32 形式 (无 cname) 的 StringName 比例
+        xrefs: .text 中引用 ClassDB::classes 的 RIP 相对指令数
+        seed: 随机种子
+
+    Returns:
+        dict: {'path', 'base', 'module_size', 'classdb_offset', 'class_names'}
+    """
+    rnd = random.Random(seed)
+    heap = _Arena(HEAP_BASE)
+    rdata = _Arena(0)
+    strings: dict[tuple[str, bool], int] = {}
+    pending_cnames: list[tuple[int, int]] = []
+
+    def stringname(name: str, utf32: bool = False) -> int:
+        key = (name, utf32)
+        sn = strings.get(key)
+        if sn is not None:
+            return sn
+        sn = heap.alloc(32)
+        if utf32:
+            data = heap.alloc(4 * (len(name) + 1))
+            heap.put(data, name.encode('utf-32-le') + bytes(4))
+            heap.put(sn + 16, struct.pack('<Q', data))
+        else:
+            # cname 位于模块的 .rdata，模块布局确定后再回填指针
+            offset = rdata.alloc(len(name) + 1, 1)
+            rdata.put(offset, name.encode('utf-8') + b'\x00')
+            pending_cnames.append((sn, offset))
+        heap.put(sn, struct.pack('<I', 1))
+        strings[key] = sn
+        return sn
+
+    def hashmap(elements: list[int]) -> bytes:
+        """为已分配的元素建立链表与 elements/hashes 数组，返回 48 字节头"""
+        if not elements:
+            return bytes(48)
+        capacity_idx = _capacity_index(len(elements))
+        capacity = HASH_TABLE_SIZE_PRIMES[capacity_idx]
+        elements_arr = heap.alloc(8 * capacity)
+        hashes_arr = heap.alloc(4 * capacity)
+        slots = rnd.sample(range(capacity), len(elements))
+        for i, (elem, slot) in enumerate(zip(elements, slots)):
+            next_ptr = elements[i + 1] if i + 1 < len(elements) else 0
+            prev_ptr = elements[i - 1] if i else 0
+            heap.put(elem, struct.pack('<QQ', next_ptr, prev_ptr))
+            heap.put(elements_arr + 8 * slot, struct.pack('<Q', elem))
+            heap.put(hashes_arr + 4 * slot, struct.pack('<I', rnd.getrandbits(32) | 1))
+        return struct.pack('<QQQQII8x', elements_arr, hashes_arr, elements[0], elements[-1],
+                           capacity_idx, len(elements))
+
+    # 类名与继承关系
+    classes = max(len(CORE_PARENTS), min(classes, 10000))
+    names = list(CORE_PARENTS)
+    parents = dict(CORE_PARENTS)
+    for i in range(classes - len(names)):
+        name = f"Class{i}"
+        parents[name] = rnd.choice(names)
+        names.append(name)
+
+    # ClassDB 元素 (ClassInfo 内联)
+    class_elements = []
+    for k, name in enumerate(names):
+        elem = heap.alloc(ELEMENT_HEADER + CLASSINFO_SIZE)
+        class_elements.append(elem)
+        utf32 = rnd.random() < utf32_ratio
+        sn = stringname(name, utf32)
+        ci = elem + ELEMENT_HEADER
+        heap.put(elem + 16, struct.pack('<Q', sn))
+        heap.put(ci + CLASSINFO_NAME_OFFSET, struct.pack('<Q', sn))
+        if parents[name]:
+            heap.put(ci + CLASSINFO_INHERITS_OFFSET, struct.pack('<Q', stringname(parents[name])))
+
+        method_elements = []
+        for j in range(methods):
+            elem_m = heap.alloc(32)
+            method_name = f"get_{name.lower()}_{j}" if j % 3 == 0 else f"method_{j}"
+            heap.put(elem_m + 16, struct.pack('<Q', stringname(method_name)))
+            arg_count = rnd.randrange(0, 5)
+            arg_types = heap.alloc(4 * (arg_count + 1))
+            heap.put(arg_types, struct.pack(f'<{arg_count + 1}i',
+                                            *(rnd.randrange(0, 29) for _ in range(arg_count + 1))))
+            flags = (0x01 if j % 7 == 0 else 0) | (0x100 if j % 2 else 0) | (0x10000 if j % 3 else 0)
+            mb = heap.alloc(80)
+            heap.put(mb, struct.pack('<QiIQ', 0x140001000, k * methods + j, 0, stringname(method_name)))
+            heap.put(mb + 48, struct.pack('<iiIIQ', 0, arg_count, flags, 0, arg_types))
+            heap.put(elem_m + 24, struct.pack('<Q', mb))
+            method_elements.append(elem_m)
+        heap.put(ci + CLASSINFO_METHOD_MAP_OFFSET, hashmap(method_elements))
+
+        prop_elements = []
+        for j in range(properties):
+            elem_p = heap.alloc(80)
+            heap.put(elem_p + 16, struct.pack('<Q', stringname(f"prop_{j}")))
+            heap.put(elem_p + 24, struct.pack('<i', rnd.choice(PROPERTY_TYPES)))
+            prop_elements.append(elem_p)
+        heap.put(ci + CLASSINFO_PROP_SETGET_OFFSET, hashmap(prop_elements))
+
+    classdb_header = hashmap(class_elements)
+
+    # 诱饵 HashMap: 结构有效，键为小写名称
+    decoy_headers = []
+    for d in range(decoys):
+        elements = []
+        for j in range(rnd.randrange(12, 200)):
+            elem = heap.alloc(48)
+            heap.put(elem + 16, struct.pack('<Q', stringname(f"decoy_{d}_{j}")))
+            elements.append(elem)
+        decoy_headers.append(hashmap(elements))
+
+    # 模块布局: headers | .text | .rdata | .data | .bss
+    text_rva = PAGE
+    text_size = max(PAGE, (xrefs + decoys) * 16 + 0x100)
+    rdata_rva = text_rva + -(-text_size // PAGE) * PAGE
+    rdata_size = max(len(rdata.buf), 1)
+    data_rva = rdata_rva + -(-rdata_size // PAGE) * PAGE
+    data_size = 0x4000 + decoys * 0x100
+    bss_rva = data_rva + -(-data_size // PAGE) * PAGE
+    bss_size = 0x4000
+    module_size = bss_rva + bss_size
+    module = bytearray(module_size)
+
+    for sn, offset in pending_cnames:
+        heap.put(sn + 8, struct.pack('<Q', IMAGE_BASE + rdata_rva + offset))
+    module[rdata_rva:rdata_rva + len(rdata.buf)] = rdata.buf
+
+    # PE 头
+    e_lfanew = 0x80
+    section_table = e_lfanew + 24 + 240
+    module[0:2] = b'MZ'
+    struct.pack_into('<I', module, 60, e_lfanew)
+    struct.pack_into('<4sHHI', module, e_lfanew, b'PE\x00\x00', 0x8664, 4, 0x60000000 + seed)
+    struct.pack_into('<H', module, e_lfanew + 20, 240)
+    struct.pack_into('<H', module, e_lfanew + 24, 0x20B)
+    struct.pack_into('<I', module, e_lfanew + 24 + 56, module_size)
+    for i, (name, rva, size) in enumerate([
+        (b'.text', text_rva, text_size),
+        (b'.rdata', rdata_rva, rdata_size),
+        (b'.data', data_rva, data_size),
+        (b'.bss', bss_rva, bss_size),
+    ]):
+        struct.pack_into('<8sII', module, section_table + i * 40, name, size, rva)
+
+    # ClassDB::classes 位于 .bss，诱饵位于 .data
+    classdb_rva = bss_rva + 0x8 * rnd.randrange(0x10, 0x100)
+    module[classdb_rva:classdb_rva + 48] = classdb_header
+    decoy_rvas = []
+    for d, header in enumerate(decoy_headers):
+        rva = data_rva + 0x100 + d * 0x100
+        module[rva:rva + 48] = header
+        decoy_rvas.append(rva)
+
+    # .text: lea rcx, [rip+ClassDB::classes] 等引用
+    insn = text_rva
+    for i in range(xrefs):
+        field = (0, 0x10, 0x18, 0x24)[i % 4]
+        disp = classdb_rva + field - (insn + 7)
+        module[insn:insn + 7] = bytes((0x48, 0x8D, 0x0D)) + struct.pack('<i', disp)
+        insn += 16
+    for rva in decoy_rvas:
+        disp = rva - (insn + 7)
+        module[insn:insn + 7] = bytes((0x48, 0x8B, 0x05)) + struct.pack('<i', disp)
+        insn += 16
+
+    write_memory_image(path, [(IMAGE_BASE, bytes(module)), (HEAP_BASE, bytes(heap.buf))],
+                       IMAGE_BASE, module_size)
+
+    return {
+        'path': path,
+        'base': IMAGE_BASE,
+        'module_size': module_size,
+        'classdb_offset': classdb_rva,
+        'class_names': names,
+    }
@@ -0,0 +1,103 @@
+"""
+ClassDB 变化监视
+
+保持附加，定期读取 ClassDB::classes 的 HashMap 头 (48 字节，绕过页缓存)。头未变化时不做其他读取；
+变化时清空页缓存与 StringName 缓存，只解析新增或 ClassInfo 变化的类，并产出 added / removed / changed 事件
+"""
+
+import struct
+from .parser import dump_all_classes, iter_all_classes
+from .scanner import HASHMAP_HEADER_SIZE
+
+
+class ClassDBWatcher:
+    """
+    ClassDB 监视器
+
+    HashMap 插入总是追加到链表尾部: 头指针不变、原尾元素有了后继且数量相符时，
+    只从原尾元素之后遍历新元素；否则重新遍历链表，ci_hash 未变化的类直接复用
+
+    Args:
+        dumper: 已定位 ClassDB 的 GodotDumper (classes 为空时先完整 dump 一次)
+        workers: 解析类成员的线程数
+    """
+
+    def __init__(self, dumper, workers: int = 1):
+        if not dumper.reader or not dumper.classdb_addr:
+            raise RuntimeError("请先调用 auto_init()")
+        self.dumper = dumper
+        self.workers = workers
+        self.header = self._read_header()
+        if not dumper.classes:
+            dumper.dump_classes(workers=workers)
+
+    def _read_header(self) -> bytes | None:
+        # 直接读取后端: 页缓存中的头不会随目标变化
+        return self.dumper.reader.backend.read(self.dumper.classdb_addr, HASHMAP_HEADER_SIZE)
+
+    def poll(self) -> list[dict]:
+        """
+        检查一次变化
+
+        Returns:
+            list of dict: [{'event': 'added' | 'removed' | 'changed', 'class': 类名, 'info': 类信息}, ...]
+                          removed 事件的 info 为最后一次看到的类信息
+        """
+        header = self._read_header()
+        if not header or len(header) < HASHMAP_HEADER_SIZE or header == self.header:
+            return []
+        old_header, self.header = self.header, header
+
+        d = self.dumper
+        # 缓存的页与 StringName 可能已过期 (扩展卸载后地址可能被复用)；
+        # 新增的类可能位于新分配的内存中
+        d.reader.clear_cache()
+        d.reader.stringnames.clear()
+        d.reader.refresh_regions()
+        previous = d.classes
+        appended = self._read_appended(old_header, header, previous)
+        if appended is not None:
+            classes = dict(previous)
+            classes.update(appended)
+        else:
+            classes = dump_all_classes(
+                d.reader, d.classdb_addr, d.base, d.module_size,
+                workers=self.workers, previous=previous
+            )
+        d._finish_dump(classes, previous)
+
+        diff = d.last_diff
+        added = set(diff['added'])
+        events = [{'event': 'added', 'class': name, 'info': classes[name]} for name in diff['added']]
+        events += [{'event': 'removed', 'class': name, 'info': previous[name]} for name in diff['removed']]
+        events += [
+            {'event': 'changed', 'class': name, 'info': classes[name]}
+            for name in diff['reparsed'] if name not in added
+        ]
+        return events
+
+    def _read_appended(self, old_header: bytes | None, header: bytes, previous: dict) -> dict | None:
+        """只在尾部追加了元素时返回新增的类，否则返回 None"""
+        if not old_header:
+            return None
+        old_head, old_tail = struct.unpack_from('<QQ', old_header, 16)
+        old_size = struct.unpack_from('<I', old_header, 36)[0]
+        head = struct.unpack_from('<Q', header, 16)[0]
+        size = struct.unpack_from('<I', header, 36)[0]
+        if head != old_head or size <= old_size or not old_tail:
+            return None
+
+        d = self.dumper
+        start = d.reader.read_qword(old_tail)
+        if not start:
+            return None
+
+        appended = {}
+        for cls in iter_all_classes(d.reader, d.classdb_addr, d.base, d.module_size,
+                                    workers=self.workers, start=start):
+            if cls['name'] in previous or cls['name'] in appended:
+                return None
+            appended[cls['name']] = cls
+        if len(appended) != size - old_size:
+            return None
+        return appended
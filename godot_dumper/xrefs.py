@@ -0,0 +1,122 @@
+"""
+代码交叉引用定位模块
+
+解码 .text 中 RIP 相对寻址的 lea/mov，统计每个 .data/.bss 地址被引用的次数。
+ClassDB::classes 被大量 ClassDB::* 函数引用，被引用越多的地址越值得优先打分
+"""
+
+import re
+import struct
+from collections import Counter
+from .memory import MemoryReader
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# REX.W(0x48) / REX.WR(0x4C) + mov store(0x89) / mov load(0x8B) / lea(0x8D)
+# ModRM: mod=00 rm=101 -> [rip+disp32]，指令长度 7
+RIP_REX = (0x48, 0x4C)
+RIP_OPCODES = (0x89, 0x8B, 0x8D)
+RIP_INSN_LEN = 7
+
+_RIP_PATTERN = re.compile(
+    rb'(?=[\x48\x4c][\x89\x8b\x8d][\x05\x0d\x15\x1d\x25\x2d\x35\x3d])', re.DOTALL
+)
+
+# 引用可能指向 HashMap 头内的字段 (_elements/_hashes/_head/_tail/_capacity_idx)
+HASHMAP_FIELD_OFFSETS = (0x00, 0x08, 0x10, 0x18, 0x20)
+
+
+def _count_numpy(data: bytes, text_va: int, lo: int, hi: int) -> Counter:
+    a = np.frombuffer(data, dtype=np.uint8)
+    n = len(a) - RIP_INSN_LEN + 1
+    if n <= 0:
+        return Counter()
+    rex = a[:n]
+    op = a[1:n + 1]
+    modrm = a[2:n + 2]
+    mask = (
+        ((rex == 0x48) | (rex == 0x4C))
+        & ((op == 0x89) | (op == 0x8B) | (op == 0x8D))
+        & ((modrm & 0xC7) == 0x05)
+    )
+    idx = np.flatnonzero(mask)
+    if not len(idx):
+        return Counter()
+    disp = (
+        a[idx + 3].astype(np.uint32)
+        | (a[idx + 4].astype(np.uint32) << 8)
+        | (a[idx + 5].astype(np.uint32) << 16)
+        | (a[idx + 6].astype(np.uint32) << 24)
+    ).view(np.int32).astype(np.int64)
+    targets = text_va + idx.astype(np.int64) + RIP_INSN_LEN + disp
+    targets = targets[(targets >= lo) & (targets < hi)]
+    values, counts = np.unique(targets, return_counts=True)
+    return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+
+def _count_regex(data: bytes, text_va: int, lo: int, hi: int) -> Counter:
+    refs = Counter()
+    limit = len(data) - RIP_INSN_LEN
+    for m in _RIP_PATTERN.finditer(data):
+        pos = m.start()
+        if pos > limit:
+            break
+        disp = struct.unpack_from('<i', data, pos + 3)[0]
+        target = text_va + pos + RIP_INSN_LEN + disp
+        if lo <= target < hi:
+            refs[target] += 1
+    return refs
+
+
+def count_rip_references(data: bytes, text_va: int, lo: int, hi: int) -> Counter:
+    """
+    统计代码中 RIP 相对 lea/mov 指向 [lo, hi) 的引用次数
+
+    有 NumPy 时向量化匹配操作码前缀，否则使用正则扫描
+
+    Returns:
+        Counter: {目标地址: 引用次数}
+    """
+    if np is not None:
+        return _count_numpy(data, text_va, lo, hi)
+    return _count_regex(data, text_va, lo, hi)
+
+
+def rank_xref_candidates(reader: MemoryReader, sections: list[dict],
+                         data_sections: list[dict]) -> list[tuple[int, int]]:
+    """
+    按代码引用次数对数据段中的 HashMap 候选地址排序
+
+    每个 .text 段只读取一次。指向 HashMap 头内字段的引用计入头部地址
+
+    Returns:
+        list of tuple: [(候选地址, 引用次数), ...]，按引用次数降序
+    """
+    text_sections = [s for s in sections if 'text' in s['name'].lower()]
+    if not text_sections or not data_sections:
+        return []
+
+    lo = min(s['va'] for s in data_sections)
+    hi = max(s['va'] + s['size'] for s in data_sections)
+
+    refs = Counter()
+    for sec in text_sections:
+        data = reader.read_view(sec['va'], sec['size'])
+        if data:
+            refs.update(count_rip_references(data, sec['va'], lo, hi))
+
+    in_data = [
+        (s['va'], s['va'] + s['size']) for s in data_sections
+    ]
+    ranked = Counter()
+    for target, count in refs.items():
+        aligned = target & ~7
+        for field in HASHMAP_FIELD_OFFSETS:
+            addr = aligned - field
+            if any(start <= addr < end for start, end in in_data):
+                ranked[addr] += count
+
+    return sorted(ranked.items(), key=lambda x: (-x[1], x[0]))